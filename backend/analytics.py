@@ -0,0 +1,200 @@
+"""Fire-and-forget visit analytics: buffered raw events plus per-minute/hour/day rollups"""
+import logging
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from pymongo import UpdateOne
+
+from metrics import ANALYTICS_EVENTS
+from pagination import check_window, naive_utc
+from write_buffer import BatchBuffer
+
+
+logger = logging.getLogger(__name__)
+
+# Largest batch a client may send in one request
+ANALYTICS_MAX_REQUEST_EVENTS = int(os.environ.get('ANALYTICS_MAX_REQUEST_EVENTS', '100'))
+ANALYTICS_MAX_BATCH = int(os.environ.get('ANALYTICS_MAX_BATCH', '500'))
+ANALYTICS_FLUSH_SECONDS = float(os.environ.get('ANALYTICS_FLUSH_SECONDS', '1'))
+# Events beyond this many unwritten ones, in flight included, are dropped rather than growing memory during a Mongo outage
+ANALYTICS_MAX_PENDING = int(os.environ.get('ANALYTICS_MAX_PENDING', '50000'))
+# Raw events are only kept for drill-down; dashboards read the rollups
+ANALYTICS_EVENT_TTL_SECONDS = int(os.environ.get('ANALYTICS_EVENT_TTL_SECONDS', str(30 * 24 * 3600)))
+
+ANALYTICS_DAY_RETENTION_DAYS = int(os.environ.get('ANALYTICS_DAY_RETENTION_DAYS', '730'))
+# Comma-separated paths to keep separate rollups for; anything else is counted as OTHER_PATH.
+# Recommended in production. Unset, each worker admits at most ANALYTICS_MAX_PATHS distinct
+# paths per ANALYTICS_PATH_PERIOD_SECONDS, carrying the busiest half over to the next period.
+ANALYTICS_ALLOWED_PATHS = [path for path in os.environ.get('ANALYTICS_ALLOWED_PATHS', '').split(',') if path.strip()]
+ANALYTICS_MAX_PATHS = int(os.environ.get('ANALYTICS_MAX_PATHS', '500'))
+ANALYTICS_PATH_PERIOD_SECONDS = float(os.environ.get('ANALYTICS_PATH_PERIOD_SECONDS', '3600'))
+ANALYTICS_MAX_PATH_LENGTH = 128
+OTHER_PATH = '(other)'
+
+# Bucket size -> (how long its rollups are kept, default dashboard window)
+ROLLUP_GRANULARITIES = {
+    'minute': (timedelta(days=7), timedelta(hours=1)),
+    'hour': (timedelta(days=90), timedelta(days=1)),
+    'day': (timedelta(days=ANALYTICS_DAY_RETENTION_DAYS), timedelta(days=30)),
+}
+
+_REPEATED_SLASHES = re.compile('/{2,}')
+
+
+def normalize_path(path: str) -> str:
+    """Rollup key for a client-reported path: no scheme, host, query or fragment, lower case"""
+    path = _REPEATED_SLASHES.sub('/', urlsplit(path.strip()).path.lower())
+    path = '/' + path.strip('/')
+    return path[:ANALYTICS_MAX_PATH_LENGTH]
+
+
+class PathCatalog:
+    """Maps reported paths onto a bounded set of rollup keys
+
+    Paths come from unauthenticated clients and rollups are kept for a long
+    time. With an allow-list, every other path shares the OTHER_PATH rollups.
+    Without one, the first max_paths distinct paths in each period are
+    admitted and later ones go to OTHER_PATH. At the end of a period the
+    busiest half of the admitted paths stay admitted and the rest are
+    forgotten. A flood of junk paths can therefore crowd out new pages only
+    until the period ends, and cannot push out pages busier than the junk.
+    """
+
+    def __init__(
+        self,
+        allowed=ANALYTICS_ALLOWED_PATHS,
+        max_paths: int = ANALYTICS_MAX_PATHS,
+        period: float = ANALYTICS_PATH_PERIOD_SECONDS,
+    ):
+        self.allowed = frozenset(normalize_path(path) for path in allowed) if allowed else None
+        self.max_paths = max_paths
+        self.period = period
+        self._hits = Counter()
+        self._period_ends = None
+
+    def resolve(self, path: str, now: float = None) -> str:
+        path = normalize_path(path)
+        if self.allowed is not None:
+            return path if path in self.allowed else OTHER_PATH
+        now = time.monotonic() if now is None else now
+        if self._period_ends is None or now >= self._period_ends:
+            self._start_period(now)
+        if path not in self._hits and len(self._hits) >= self.max_paths:
+            return OTHER_PATH
+        self._hits[path] += 1
+        return path
+
+    def _start_period(self, now: float):
+        # Carried-over paths start the new period at zero hits, so they have to earn their place again
+        self._hits = Counter({path: 0 for path, _ in self._hits.most_common(self.max_paths // 2)})
+        self._period_ends = now + self.period
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_updates(events):
+    """One $inc upsert per (granularity, bucket, path, event), pre-summed across the batch"""
+    counts = Counter()
+    for event in events:
+        for granularity in ROLLUP_GRANULARITIES:
+            counts[(granularity, bucket_start(event['timestamp'], granularity), event['path'], event['event'])] += 1
+    updates = []
+    for (granularity, bucket, path, name), count in counts.items():
+        retention = ROLLUP_GRANULARITIES[granularity][0]
+        updates.append(UpdateOne(
+            {'granularity': granularity, 'bucket': bucket, 'path': path, 'event': name},
+            {'$inc': {'count': count}, '$setOnInsert': {'expires_at': bucket + retention}},
+            upsert=True,
+        ))
+    return updates
+
+
+class VisitRecorder(BatchBuffer):
+    """Buffers visit events in-process and writes them in batches
+
+    Callers never wait on Mongo: record() only appends. A flush inserts the raw
+    events with one insert_many and folds them into the rollup collection with
+    one unordered bulk_write of $inc upserts.
+    """
+
+    def __init__(
+        self,
+        events,
+        rollups,
+        max_batch: int = ANALYTICS_MAX_BATCH,
+        flush_seconds: float = ANALYTICS_FLUSH_SECONDS,
+        max_pending: int = ANALYTICS_MAX_PENDING,
+        paths: PathCatalog = None,
+    ):
+        super().__init__(max_batch, flush_seconds)
+        self.events = events
+        self.rollups = rollups
+        self.max_pending = max_pending
+        self.paths = paths or PathCatalog()
+
+    def record(self, events) -> int:
+        """Queue events for the next flush; returns how many were accepted"""
+        room = self.max_pending - self.buffered
+        accepted = events[:max(room, 0)]
+        if len(accepted) < len(events):
+            ANALYTICS_EVENTS.inc(len(events) - len(accepted), result='dropped')
+        if not accepted:
+            return 0
+        ANALYTICS_EVENTS.inc(len(accepted), result='accepted')
+        self._add([{**event, 'path': self.paths.resolve(event['path'])} for event in accepted])
+        return len(accepted)
+
+    async def _write(self, batch):
+        try:
+            # insert_many adds _id to the dicts it is given, so hand it copies
+            await self.events.insert_many([dict(event) for event in batch], ordered=False)
+            await self.rollups.bulk_write(rollup_updates(batch), ordered=False)
+        except Exception as e:
+            ANALYTICS_EVENTS.inc(len(batch), result='failed')
+            logger.error(f"Writing {len(batch)} visit events failed: {str(e)}")
+            return
+        ANALYTICS_EVENTS.inc(len(batch), result='written')
+
+
+def analytics_window(granularity: str, since: datetime = None, until: datetime = None):
+    """Naive UTC bounds, defaulting to the granularity's dashboard window; 400 when empty"""
+    until = naive_utc(until) or datetime.utcnow()
+    return check_window(since or until - ROLLUP_GRANULARITIES[granularity][1], until)
+
+
+def visits_pipeline(granularity: str, since: datetime, until: datetime, path: str = None, event: str = None):
+    """Visit counts per bucket, summed across the rollup documents in the window"""
+    match = {'granularity': granularity, 'bucket': {'$gte': bucket_start(since, granularity), '$lt': until}}
+    if path is not None:
+        match['path'] = path
+    if event is not None:
+        match['event'] = event
+    return [
+        {'$match': match},
+        {'$group': {'_id': '$bucket', 'count': {'$sum': '$count'}}},
+        {'$sort': {'_id': 1}},
+        {'$project': {'_id': 0, 'bucket': '$_id', 'count': 1}},
+    ]
+
+
+def top_paths_pipeline(granularity: str, since: datetime, until: datetime, limit: int, event: str = None):
+    match = {'granularity': granularity, 'bucket': {'$gte': bucket_start(since, granularity), '$lt': until}}
+    if event is not None:
+        match['event'] = event
+    return [
+        {'$match': match},
+        {'$group': {'_id': '$path', 'count': {'$sum': '$count'}}},
+        {'$sort': {'count': -1, '_id': 1}},
+        {'$limit': limit},
+        {'$project': {'_id': 0, 'path': '$_id', 'count': 1}},
+    ]
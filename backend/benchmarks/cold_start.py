@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget check for the backend
+Each run starts a fresh interpreter, times `import server`, then the lifespan
+startup and the first GET /api/portfolio against a mongomock-motor stand-in.
+Medians over --runs are compared to the budgets; any overrun exits nonzero,
+so CI can hold the line on what every autoscaled worker pays on scale-out.
+tests/test_cold_start.py asserts the same budgets on a single run.
+
+Examples:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 7 --import-budget-ms 800 --first-request-budget-ms 1200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_BUDGET_MS = float(os.environ.get('COLD_START_IMPORT_BUDGET_MS', '1000'))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('COLD_START_FIRST_REQUEST_BUDGET_MS', '1500'))
+
+# Runs in the child interpreter; the stand-in client is patched in before the clock starts
+CHILD = r"""
+import asyncio, json, os, sys, time
+sys.path.insert(0, os.environ['BACKEND_DIR'])
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'cold_start')
+os.environ.setdefault('PORTFOLIO_WATCH_SECONDS', '0')
+import httpx
+import motor.motor_asyncio
+from mongomock_motor import AsyncMongoMockClient
+motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+
+async def first_request():
+    async with server.app.router.lifespan_context(server.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://cold-start') as client:
+            response = await client.get('/api/portfolio')
+        served = time.perf_counter()
+        response.raise_for_status()
+        return started, served
+
+started, served = asyncio.run(first_request())
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'startup_ms': (started - imported) * 1000,
+    'first_request_ms': (served - start) * 1000,
+    'modules': len(sys.modules),
+}))
+"""
+
+
+def measure_once():
+    env = {**os.environ, 'BACKEND_DIR': str(BACKEND_DIR)}
+    spawned = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Cold-start run failed:\n{result.stderr}")
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - spawned) * 1000
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--first-request-budget-ms', type=float, default=FIRST_REQUEST_BUDGET_MS)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    medians = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+    print(f"Cold start, median of {args.runs} fresh interpreters")
+    print(f"  import server        {medians['import_ms']:8.1f} ms  (budget {args.import_budget_ms:.0f} ms)")
+    print(f"  lifespan startup     {medians['startup_ms']:8.1f} ms")
+    print(f"  first request ready  {medians['first_request_ms']:8.1f} ms  (budget {args.first_request_budget_ms:.0f} ms)")
+    print(f"  whole process        {medians['process_ms']:8.1f} ms")
+    print(f"  modules loaded       {medians['modules']:8.0f}")
+
+    over = []
+    if medians['import_ms'] > args.import_budget_ms:
+        over.append('import')
+    if medians['first_request_ms'] > args.first_request_budget_ms:
+        over.append('first request')
+    if over:
+        print(f"\nOver budget: {', '.join(over)}")
+        sys.exit(1)
+    print("\nWithin budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the API response encoders on real payloads
+Compares FastAPI's default path (jsonable_encoder + stdlib JSONResponse)
+with ORJSONResponse on the /api/portfolio document and /api/contacts pages
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from portfolio_data import get_portfolio_data
+
+
+def make_contacts(count):
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Visitor {i}",
+            "email": f"visitor{i}@example.com",
+            "subject": "Collaboration on a multiplayer project",
+            "message": "Hi Jatin, I saw your work on network multiplayer and would love to chat. " * 3,
+            "timestamp": start + timedelta(minutes=i),
+            "status": "new",
+        }
+        for i in range(count)
+    ]
+
+
+def stdlib(content):
+    """FastAPI default: jsonable_encoder then json.dumps"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def orjson_encoded(content):
+    """Default response class swapped to orjson, jsonable_encoder still applied"""
+    return ORJSONResponse(jsonable_encoder(content)).body
+
+
+def orjson_direct(content):
+    """Handler returns ORJSONResponse itself, so orjson sees datetimes natively"""
+    return ORJSONResponse(content).body
+
+
+def bench(func, content, number, repeat=5):
+    return min(timeit.repeat(lambda: func(content), number=number, repeat=repeat)) / number
+
+
+def main():
+    payloads = [
+        ("/api/portfolio", {"success": True, "data": get_portfolio_data()}, 2000),
+        ("/api/contacts (50)", {"success": True, "data": make_contacts(50), "next_cursor": None}, 500),
+        ("/api/contacts (500)", {"success": True, "data": make_contacts(500), "next_cursor": None}, 50),
+    ]
+    print(f"{'payload':<22} {'bytes':>7} {'stdlib µs':>10} {'orjson µs':>10} {'direct µs':>10} {'speedup':>8}")
+    for name, content, number in payloads:
+        size = len(orjson_direct(content))
+        base = bench(stdlib, content, number)
+        encoded = bench(orjson_encoded, content, number)
+        direct = bench(orjson_direct, content, number)
+        print(
+            f"{name:<22} {size:>7} {base * 1e6:>10.1f} {encoded * 1e6:>10.1f} "
+            f"{direct * 1e6:>10.1f} {base / direct:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the portfolio backend
+Drives /api/portfolio, /api/contact, /api/contacts, /api/status and /api/analytics either
+in-process against a mongomock-motor stand-in or against a running uvicorn,
+reports p50/p95/p99 latency and throughput, and saves or diffs a baseline
+
+Examples:
+    python benchmarks/load_test.py --requests 2000 --concurrency 50 --save baseline.json
+    python benchmarks/load_test.py --compare baseline.json
+    python benchmarks/load_test.py --base-url http://localhost:8001 --scenarios portfolio,contacts
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+_counter = itertools.count()
+
+
+def contact_body():
+    # Unique content per request, otherwise duplicate detection short-circuits the write path
+    n = next(_counter)
+    return {
+        "name": "Load Tester",
+        "email": f"load{n % 1000}@example.com",
+        "subject": f"Load test message {n}",
+        "message": f"Benchmark submission {n} {uuid.uuid4()}",
+    }
+
+
+SCENARIOS = {
+    'portfolio': lambda client: client.get('/api/portfolio'),
+    'portfolio_304': lambda client: client.get('/api/portfolio', headers={'If-None-Match': client.portfolio_etag}),
+    'contact': lambda client: client.post('/api/contact', json=contact_body()),
+    'contacts': lambda client: client.get('/api/contacts', params={'limit': 50}),
+    'status_write': lambda client: client.post('/api/status', json={'client_name': 'load-test'}),
+    'status': lambda client: client.get('/api/status', params={'limit': 50}),
+    'analytics': lambda client: client.post('/api/analytics/visit', json=[{'path': '/'}, {'path': '/projects'}]),
+    'analytics_read': lambda client: client.get('/api/analytics/visits', params={'granularity': 'minute'}),
+}
+DEFAULT_SCENARIOS = 'portfolio,portfolio_304,contact,contacts,status_write,status,analytics,analytics_read'
+
+
+async def run_scenario(client, name, total, concurrency):
+    request = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await request(client)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'errors': errors,
+        'throughput_rps': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def seed(client, contacts, status_checks):
+    """Fill the collections so listing endpoints have real pages to read"""
+    db = client.app_module.db
+    start = datetime.utcnow() - timedelta(days=1)
+    if contacts:
+        await db.contacts.insert_many([
+            {**contact_body(), 'id': str(uuid.uuid4()), 'status': 'new', 'timestamp': start + timedelta(seconds=i)}
+            for i in range(contacts)
+        ])
+    if status_checks:
+        await db.status_checks.insert_many([
+            {'id': str(uuid.uuid4()), 'client_name': f'client-{i % 10}', 'timestamp': start + timedelta(seconds=i)}
+            for i in range(status_checks)
+        ])
+
+
+def load_inprocess_app():
+    """Import server with every Motor client replaced by mongomock-motor"""
+    import motor.motor_asyncio
+    from mongomock_motor import AsyncMongoMockClient
+
+    os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    os.environ.setdefault('DB_NAME', 'load_test')
+    # The harness hammers one client IP and one email pool on purpose
+    os.environ.setdefault('CONTACT_RATE_LIMIT_PER_IP', '1000000000/60')
+    os.environ.setdefault('CONTACT_RATE_LIMIT_PER_EMAIL', '1000000000/60')
+    os.environ.setdefault('PORTFOLIO_WATCH_SECONDS', '0')
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    # server configures INFO logging; per-request client logs would swamp the report
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    return server
+
+
+async def run(args):
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30)
+        client.app_module = None
+        lifespan = None
+    else:
+        server = load_inprocess_app()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url='http://load-test', timeout=30
+        )
+        client.app_module = server
+        lifespan = server.app.router.lifespan_context(server.app)
+
+    results = {}
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            if client.app_module is not None:
+                await seed(client, args.seed_contacts, args.seed_status)
+            client.portfolio_etag = (await client.get('/api/portfolio')).headers.get('etag', '')
+            for name in scenarios:
+                # Warm-up so one-off costs (first compression, imports) stay out of the numbers
+                await run_scenario(client, name, min(args.requests, 50), min(args.concurrency, 10))
+                results[name] = await run_scenario(client, name, args.requests, args.concurrency)
+                print_row(name, results[name])
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def print_header():
+    print(f"{'scenario':<15} {'req':>6} {'conc':>5} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+
+def print_row(name, result):
+    print(
+        f"{name:<15} {result['requests']:>6} {result['concurrency']:>5} {result['errors']:>5} "
+        f"{result['throughput_rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+    )
+
+
+def compare(baseline, results, max_regression):
+    """Print p95/throughput deltas against a baseline; return the regressed scenarios"""
+    regressions = []
+    print()
+    print(f"{'scenario':<15} {'p95 base':>9} {'p95 now':>9} {'delta':>8} {'rps base':>9} {'rps now':>9}")
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        delta = (result['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        print(
+            f"{name:<15} {base['p95_ms']:>9.2f} {result['p95_ms']:>9.2f} {delta:>+7.0%} "
+            f"{base['throughput_rps']:>9.1f} {result['throughput_rps']:>9.1f}"
+        )
+        if delta > max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help="Target a running server instead of the in-process app")
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS)
+    parser.add_argument('--requests', type=int, default=1000, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--seed-contacts', type=int, default=1000, help="In-process only")
+    parser.add_argument('--seed-status', type=int, default=1000, help="In-process only")
+    parser.add_argument('--save', help="Write results to this baseline JSON file")
+    parser.add_argument('--compare', help="Diff results against this baseline JSON file")
+    parser.add_argument('--max-regression', type=float, default=0.25, help="Allowed p95 increase before failing")
+    args = parser.parse_args()
+
+    print_header()
+    results = asyncio.run(run(args))
+
+    if args.save:
+        baseline = {
+            'created_at': datetime.utcnow().isoformat(),
+            'target': args.base_url or 'in-process (mongomock-motor)',
+            'python': platform.python_version(),
+            'results': results,
+        }
+        Path(args.save).write_text(json.dumps(baseline, indent=2) + '\n')
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline, results, args.max_regression)
+        if regressions:
+            print(f"\np95 regressed by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+    if any(result['errors'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the GET /api/status read path
+Compares rebuilding StatusCheck models plus response_model validation against
+serializing trusted Mongo rows directly with the precompiled TypeAdapter
+"""
+
+import asyncio
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from server import StatusCheck, status_check_rows
+
+
+def make_rows(count):
+    start = datetime(2025, 1, 1)
+    return [
+        {"id": str(uuid.uuid4()), "client_name": f"client-{i % 10}", "timestamp": start + timedelta(seconds=i)}
+        for i in range(count)
+    ]
+
+
+response_field = create_response_field(name="Response_get_status_checks", type_=List[StatusCheck])
+loop = asyncio.new_event_loop()
+
+
+def before(rows):
+    """Model per row, then response_model validation and the stdlib JSON encoder"""
+    content = [StatusCheck(**row) for row in rows]
+    encoded = loop.run_until_complete(
+        serialize_response(field=response_field, response_content=content, is_coroutine=True)
+    )
+    return JSONResponse(encoded).body
+
+
+def after(rows):
+    """Rows serialized as-is by the precompiled serializer"""
+    return status_check_rows.dump_json(rows)
+
+
+def bench(func, rows, repeat=5):
+    number = max(1, 20000 // len(rows))
+    best = min(timeit.repeat(lambda: func(rows), number=number, repeat=repeat)) / number
+    return best
+
+
+def main():
+    print(f"{'rows':>6} {'before µs/row':>14} {'after µs/row':>13} {'speedup':>8}")
+    for count in (1000, 10000):
+        rows = make_rows(count)
+        assert len(before(rows)) > 0 and len(after(rows)) > 0
+        slow = bench(before, rows)
+        fast = bench(after, rows)
+        print(f"{count:>6} {slow / count * 1e6:>14.2f} {fast / count * 1e6:>13.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Accept-Encoding negotiated gzip/brotli response compression"""
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_LEVEL = int(os.environ.get('BROTLI_LEVEL', '5'))
+# Payloads compressed once and reused can afford the slowest, smallest settings
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_LEVEL = 11
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'text/',
+)
+# Compression buffers would delay events on long-lived streams
+UNCOMPRESSIBLE_TYPES = ('text/event-stream',)
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding: str, available=None):
+    """Pick the best content-coding from an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    available = available or supported_encodings()
+    weights = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    best, best_q = None, 0.0
+    # available is ordered by preference, so ties go to the earlier coding
+    for coding in available:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a complete body with the given content-coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_LEVEL if static else BROTLI_LEVEL)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content-coding: {encoding}")
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_LEVEL)
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+            self._compress = self._compressor.process
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+            self._compress = self._compressor.compress
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush every chunk so streamed exports reach the client as they are produced
+        return self._compress(data) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(headers):
+    for index, (name, value) in enumerate(headers):
+        if name == b'vary':
+            if b'accept-encoding' not in value.lower():
+                headers[index] = (name, value + b', Accept-Encoding')
+            return
+    headers.append((b'vary', b'Accept-Encoding'))
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best encoding the client accepts
+
+    Responses that already carry a Content-Encoding (such as pre-compressed cached
+    payloads) and bodies smaller than minimum_size are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ''
+        for name, value in scope['headers']:
+            if name == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        message_type = message['type']
+        if message_type == 'http.response.start':
+            headers = dict(message.get('headers', []))
+            self.start_message = message
+            self.passthrough = (
+                b'content-encoding' in headers
+                or not _is_compressible(headers.get(b'content-type', b'').decode('latin-1'))
+            )
+            return
+        if message_type != 'http.response.body':
+            await self.send(message)
+            return
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            headers = [(k, v) for k, v in start.get('headers', []) if k != b'content-length']
+            headers.append((b'content-encoding', self.encoding.encode('latin-1')))
+            _add_vary(headers)
+            if not more_body:
+                body = compress(body, self.encoding)
+                headers.append((b'content-length', str(len(body)).encode('latin-1')))
+                await self.send({**start, 'headers': headers})
+                await self.send({'type': 'http.response.body', 'body': body})
+                return
+            self.compressor = _StreamCompressor(self.encoding)
+            await self.send({**start, 'headers': headers})
+            await self.send({'type': 'http.response.body', 'body': self.compressor.chunk(body), 'more_body': True})
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+        body = message.get('body', b'')
+        if message.get('more_body', False):
+            await self.send({'type': 'http.response.body', 'body': self.compressor.chunk(body), 'more_body': True})
+        else:
+            data = self.compressor.chunk(body) if body else b''
+            await self.send({'type': 'http.response.body', 'body': data + self.compressor.finish()})
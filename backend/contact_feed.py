@@ -0,0 +1,215 @@
+"""In-process fan-out of new contact submissions to Server-Sent Events subscribers"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import orjson
+from fastapi import HTTPException
+from pymongo.errors import OperationFailure
+
+from pagination import decode_cursor, encode_cursor
+
+
+logger = logging.getLogger(__name__)
+
+# Recent events kept per worker for Last-Event-ID resume without a Mongo round trip
+CONTACT_FEED_BACKLOG = int(os.environ.get('CONTACT_FEED_BACKLOG', '1000'))
+CONTACT_FEED_HEARTBEAT_SECONDS = float(os.environ.get('CONTACT_FEED_HEARTBEAT_SECONDS', '15'))
+CONTACT_FEED_MAX_SUBSCRIBERS = int(os.environ.get('CONTACT_FEED_MAX_SUBSCRIBERS', '100'))
+# A subscriber this many events behind is disconnected and resumes with Last-Event-ID
+CONTACT_FEED_QUEUE_SIZE = int(os.environ.get('CONTACT_FEED_QUEUE_SIZE', '256'))
+# Streams are closed after this long and the client resumes with Last-Event-ID. uvicorn
+# waits for open connections before running the shutdown hook, so an endless stream
+# would hold a stopping worker up indefinitely.
+CONTACT_FEED_MAX_STREAM_SECONDS = float(os.environ.get('CONTACT_FEED_MAX_STREAM_SECONDS', '60'))
+# Also follow inserts made by other workers through a change stream (needs a replica set)
+CONTACT_FEED_CHANGE_STREAM = os.environ.get('CONTACT_FEED_CHANGE_STREAM', 'false').lower() == 'true'
+CONTACT_FEED_RETRY_SECONDS = 5
+
+
+def format_event(event_id: str, data: bytes, event: str = 'contact') -> bytes:
+    return b'id: ' + event_id.encode('ascii') + b'\nevent: ' + event.encode('ascii') + b'\ndata: ' + data + b'\n\n'
+
+
+def format_position(event_id: str) -> bytes:
+    """An id with no data: sets the client's Last-Event-ID without dispatching an event"""
+    return b'id: ' + event_id.encode('ascii') + b'\n\n'
+
+
+class ContactFeed:
+    """Publishes stored contacts to every open stream on this worker
+
+    Event ids are the contact's keyset cursor, so a client reconnecting with
+    Last-Event-ID is replayed from the in-process backlog when the id is still
+    in it, and from the contacts collection otherwise (another worker, or a
+    restart). Contacts are de-duplicated by id, so the local publish and the
+    optional change stream can both feed the same worker.
+    """
+
+    def __init__(self, collection, fields, backlog: int = CONTACT_FEED_BACKLOG):
+        self.collection = collection
+        self.fields = tuple(fields)
+        self.backlog_size = backlog
+        self._backlog = OrderedDict()
+        self._subscribers = set()
+        self._task = None
+
+    def _event(self, contact: dict):
+        # Mongo keeps milliseconds; ids must match the stored value for the resume query
+        timestamp = contact['timestamp']
+        contact = {**contact, 'timestamp': timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)}
+        event_id = encode_cursor(contact)
+        data = orjson.dumps({field: contact[field] for field in self.fields if field in contact})
+        return event_id, format_event(event_id, data)
+
+    def publish(self, contact: dict):
+        """Fan a stored contact out to the current subscribers"""
+        if contact['id'] in self._backlog:
+            return
+        event = self._event(contact)
+        self._backlog[contact['id']] = event
+        while len(self._backlog) > self.backlog_size:
+            self._backlog.popitem(last=False)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up; closing lets it resume from its last event id
+                self._close(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def check_capacity(self):
+        """503 before the response starts; stream() itself can no longer turn a request away"""
+        if len(self._subscribers) >= CONTACT_FEED_MAX_SUBSCRIBERS:
+            raise HTTPException(status_code=503, detail="Too many open contact streams")
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=CONTACT_FEED_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _close(self, queue: asyncio.Queue):
+        """Drop a subscriber; the None sentinel ends its stream"""
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _replay(self, last_event_id: str):
+        """Events after last_event_id, from the backlog if it is there, else from Mongo"""
+        events = list(self._backlog.values())
+        for index, (event_id, _) in enumerate(events):
+            if event_id == last_event_id:
+                return events[index + 1:]
+        try:
+            timestamp, contact_id = decode_cursor(last_event_id)
+        except HTTPException:
+            return []
+        query = {'$or': [
+            {'timestamp': {'$gt': timestamp}},
+            {'timestamp': timestamp, 'id': {'$gt': contact_id}},
+        ]}
+        projection = {'_id': 0, **{field: 1 for field in self.fields}}
+        cursor = self.collection.find(query, projection).sort([('timestamp', 1), ('id', 1)])
+        return [self._event(contact) for contact in await cursor.to_list(self.backlog_size)]
+
+    async def _head(self):
+        """Event id of the newest contact, so a fresh client has a position to resume from"""
+        if self._backlog:
+            return next(reversed(self._backlog.values()))[0]
+        try:
+            newest = await self.collection.find_one({}, {'_id': 0, 'id': 1, 'timestamp': 1}, sort=[('timestamp', -1), ('id', -1)])
+        except Exception as e:
+            logger.warning(f"Could not read the newest contact for a stream position: {str(e)}")
+            return None
+        return self._event(newest)[0] if newest else encode_cursor({'timestamp': datetime(1970, 1, 1), 'id': ''})
+
+    async def stream(
+        self,
+        last_event_id: str = None,
+        heartbeat: float = CONTACT_FEED_HEARTBEAT_SECONDS,
+        max_seconds: float = CONTACT_FEED_MAX_STREAM_SECONDS,
+    ):
+        """SSE body: replay after last_event_id, then live events with comment heartbeats
+
+        Subscribes before the replay, so nothing published during it is lost,
+        and only once the body is being sent: a client gone before then never
+        leaves a queue behind. After max_seconds the stream ends; the client
+        reconnects with Last-Event-ID and is replayed whatever arrived in between.
+        """
+        deadline = time.monotonic() + max_seconds
+        queue = self.subscribe()
+        try:
+            yield f'retry: {CONTACT_FEED_RETRY_SECONDS * 1000}\n\n'.encode('ascii')
+            sent = set()
+            if last_event_id:
+                for event_id, body in await self._replay(last_event_id):
+                    sent.add(event_id)
+                    yield body
+            else:
+                head = await self._head()
+                if head is not None:
+                    yield format_position(head)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), min(heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    if time.monotonic() < deadline:
+                        # Keeps proxies from closing an idle connection
+                        yield b': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                event_id, body = event
+                if event_id in sent:
+                    continue
+                yield body
+        finally:
+            self.unsubscribe(queue)
+
+    async def _follow_change_stream(self):
+        pipeline = [{'$match': {'operationType': 'insert'}}]
+        async with self.collection.watch(pipeline) as stream:
+            async for change in stream:
+                self.publish(change['fullDocument'])
+
+    async def _watch(self):
+        while True:
+            try:
+                await self._follow_change_stream()
+            except OperationFailure as e:
+                # Change streams need a replica set or sharded cluster; local publishing still works
+                logger.info(f"Contact change stream unavailable ({str(e)}), streaming this worker's submissions only")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Contact change stream interrupted: {str(e)}")
+                await asyncio.sleep(CONTACT_FEED_RETRY_SECONDS)
+
+    def start(self):
+        if CONTACT_FEED_CHANGE_STREAM:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        for queue in list(self._subscribers):
+            self._close(queue)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
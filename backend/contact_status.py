@@ -0,0 +1,98 @@
+"""Contact status transitions and the per-status counters behind the inbox badges"""
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+CONTACT_COUNTS_ID = 'status'
+
+
+class ContactStatusCounts:
+    """Per-status contact totals kept in one counter document
+
+    Every write that changes a contact's status moves the matching amount
+    between counters with $inc, so badges are one find_one by _id instead of a
+    count_documents scan. seed() creates the document from a recount on the
+    first startup; rebuild() repairs drift left by a crash between a write and
+    its $inc, and is run by hand with recount_contacts.py.
+    """
+
+    def __init__(self, collection, statuses):
+        self.collection = collection
+        self.statuses = tuple(statuses)
+
+    def _complete(self, document) -> dict:
+        document = document or {}
+        return {status: document.get(status, 0) for status in self.statuses}
+
+    async def get(self) -> dict:
+        return self._complete(await self.collection.find_one({'_id': CONTACT_COUNTS_ID}))
+
+    async def increment(self, changes: dict) -> dict:
+        changes = {status: amount for status, amount in changes.items() if amount}
+        if not changes:
+            return await self.get()
+        document = await self.collection.find_one_and_update(
+            {'_id': CONTACT_COUNTS_ID},
+            {'$inc': changes},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._complete(document)
+
+    async def count(self, contacts) -> dict:
+        grouped = await contacts.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]).to_list(None)
+        counts = {status: 0 for status in self.statuses}
+        counts.update({row['_id']: row['count'] for row in grouped if row['_id'] in counts})
+        return counts
+
+    async def seed(self, contacts) -> bool:
+        """Create the counter document from a recount if there is none yet
+
+        Never overwrites an existing document: during a rolling restart other
+        workers keep applying $incs, and a count followed by a write would lose
+        the ones landing in between.
+        """
+        if await self.collection.find_one({'_id': CONTACT_COUNTS_ID}, {'_id': 1}) is not None:
+            return False
+        counts = await self.count(contacts)
+        try:
+            await self.collection.insert_one({'_id': CONTACT_COUNTS_ID, **counts})
+        except DuplicateKeyError:
+            # Another worker, or a submission's upsert, created it first
+            return False
+        return True
+
+    async def rebuild(self, contacts) -> dict:
+        """Overwrite the counters with a fresh count
+
+        $incs made between the count and the write are lost, so this is an
+        admin step for a quiet moment rather than something every worker runs.
+        """
+        counts = await self.count(contacts)
+        await self.collection.replace_one({'_id': CONTACT_COUNTS_ID}, counts, upsert=True)
+        return counts
+
+
+async def transition_contacts(contacts, counts: ContactStatusCounts, match: dict, target: str, sources=None):
+    """Move every contact matching the filter to the target status
+
+    One update_many per source status rather than a single one across all of
+    them: each result's modified_count is then exactly the number of contacts
+    that left that status, which is what the counters need.
+    """
+    moved = {}
+    now = datetime.utcnow()
+    for source in sources or counts.statuses:
+        if source == target:
+            continue
+        result = await contacts.update_many(
+            {**match, 'status': source},
+            {'$set': {'status': target, 'status_updated_at': now}},
+        )
+        if result.modified_count:
+            moved[source] = result.modified_count
+    changes = {source: -amount for source, amount in moved.items()}
+    changes[target] = sum(moved.values())
+    return moved, await counts.increment(changes)
@@ -0,0 +1,67 @@
+"""Constant-memory streaming of Mongo cursors as NDJSON or CSV"""
+import csv
+import io
+import os
+
+import orjson
+
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """Cell text for a CSV export; user text that would run as a formula is prefixed with '"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _json_default(value):
+    # orjson already handles datetime and UUID natively
+    return str(value)
+
+
+async def _batches(cursor, batch_size: int):
+    # Mirrors the driver's batch size so at most one batch is held in memory
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_stream(cursor, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield one encoded chunk of newline-delimited JSON per driver batch"""
+    async for batch in _batches(cursor.batch_size(batch_size), batch_size):
+        yield b''.join(
+            orjson.dumps(document, default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+            for document in batch
+        )
+
+
+async def csv_stream(cursor, fields, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield a CSV header and then one encoded chunk of rows per driver batch"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue().encode('utf-8')
+    async for batch in _batches(cursor.batch_size(batch_size), batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for document in batch:
+            writer.writerow({key: csv_cell(value) for key, value in document.items()})
+        yield buffer.getvalue().encode('utf-8')
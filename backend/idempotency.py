@@ -0,0 +1,96 @@
+"""Duplicate contact submission detection by Idempotency-Key or content hash"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+from metrics import CACHE_LOOKUPS
+
+
+# Identical submissions inside this window are treated as retries of the first one
+CONTACT_DEDUP_WINDOW_SECONDS = int(os.environ.get('CONTACT_DEDUP_WINDOW_SECONDS', '600'))
+CONTACT_DEDUP_CACHE_SIZE = int(os.environ.get('CONTACT_DEDUP_CACHE_SIZE', '10000'))
+
+
+def submission_key(contact: dict, idempotency_key: str = None) -> str:
+    """Client-supplied key when present, otherwise a hash of the message content"""
+    if idempotency_key:
+        return 'key:' + hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()
+    content = '\x00'.join([contact['email'].strip().lower(), contact['subject'].strip(), contact['message'].strip()])
+    return 'content:' + hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class RecentKeys:
+    """Bounded LRU of recently seen keys, each remembered for the dedup window"""
+
+    def __init__(self, max_entries: int = CONTACT_DEDUP_CACHE_SIZE, window: float = CONTACT_DEDUP_WINDOW_SECONDS):
+        self.max_entries = max_entries
+        self.window = window
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            seen_at = self._entries.get(key)
+            if seen_at is None:
+                return False
+            if time.monotonic() - seen_at > self.window:
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: str):
+        with self._lock:
+            self._entries[key] = time.monotonic()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SubmissionDeduplicator:
+    """Lets only the first of a set of duplicate submissions through
+
+    The in-process LRU answers repeats from the same worker without a round
+    trip; the contact_dedup collection, keyed by the submission key and
+    expired by a TTL index, catches repeats that land on another worker.
+    """
+
+    def __init__(self, collection, window: float = CONTACT_DEDUP_WINDOW_SECONDS):
+        self.collection = collection
+        self.window = window
+        self.recent = RecentKeys(window=window)
+
+    async def claim(self, key: str, contact_id: str) -> bool:
+        """True if this is the first submission with this key inside the window"""
+        if key in self.recent:
+            CACHE_LOOKUPS.inc(cache='contact_dedup', result='hit')
+            return False
+        CACHE_LOOKUPS.inc(cache='contact_dedup', result='miss')
+        now = datetime.utcnow()
+        try:
+            await self.collection.insert_one({'_id': key, 'contact_id': contact_id, 'created_at': now})
+        except DuplicateKeyError:
+            # The TTL monitor runs about once a minute, so expired claims may still exist
+            result = await self.collection.update_one(
+                {'_id': key, 'created_at': {'$lt': now - timedelta(seconds=self.window)}},
+                {'$set': {'contact_id': contact_id, 'created_at': now}},
+            )
+            if result.modified_count != 1:
+                self.recent.add(key)
+                return False
+        self.recent.add(key)
+        return True
+
+    async def release(self, key: str):
+        """Forget a claim whose submission failed, so the client can retry it"""
+        self.recent.discard(key)
+        await self.collection.delete_one({'_id': key})
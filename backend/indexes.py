@@ -0,0 +1,201 @@
+"""Declared Mongo indexes, reconciled at startup, and explain()-based checks of the hot queries"""
+import logging
+import os
+
+from bson import SON
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from analytics import ANALYTICS_EVENT_TTL_SECONDS
+from idempotency import CONTACT_DEDUP_WINDOW_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+# Raw status checks expire after this many seconds when set; unset keeps them forever
+STATUS_CHECK_TTL_SECONDS = os.environ.get('STATUS_CHECK_TTL_SECONDS')
+
+# Options compared when deciding whether an existing index matches its declaration
+_COMPARED_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+def declared_indexes():
+    """Index declarations per collection, keyed by collection name"""
+    status_check_expiry = []
+    if STATUS_CHECK_TTL_SECONDS:
+        # TTL indexes must be single-field, so expiry gets its own index; the
+        # timestamp_id index already serves every read, so it only exists with a TTL
+        status_check_expiry.append(IndexModel(
+            [('timestamp', ASCENDING)],
+            name='status_checks_timestamp',
+            expireAfterSeconds=int(STATUS_CHECK_TTL_SECONDS),
+        ))
+    return {
+        'contacts': [
+            IndexModel([('id', ASCENDING)], name='contacts_id', unique=True),
+            # Serves newest-first listing and keyset pagination on (timestamp, id)
+            IndexModel([('timestamp', DESCENDING), ('id', DESCENDING)], name='contacts_timestamp_id'),
+            IndexModel(
+                [('status', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)],
+                name='contacts_status_timestamp_id',
+            ),
+            # Inbox search; senders are found by name or address before subject and body
+            IndexModel(
+                [('name', TEXT), ('email', TEXT), ('subject', TEXT), ('message', TEXT)],
+                name='contacts_text',
+                weights={'name': 10, 'email': 10, 'subject': 5, 'message': 1},
+            ),
+        ],
+        'status_checks': [
+            IndexModel([('id', ASCENDING)], name='status_checks_id', unique=True),
+            IndexModel(
+                [('timestamp', DESCENDING), ('id', DESCENDING)],
+                name='status_checks_timestamp_id',
+            ),
+            # Per-client listing and summaries
+            IndexModel(
+                [('client_name', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)],
+                name='status_checks_client_timestamp_id',
+            ),
+            *status_check_expiry,
+        ],
+        'email_outbox': [
+            IndexModel([('id', ASCENDING)], name='email_outbox_id', unique=True),
+            IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)], name='email_outbox_status_due'),
+        ],
+        # Duplicate-submission claims only matter inside the dedup window
+        'contact_dedup': [
+            IndexModel(
+                [('created_at', ASCENDING)],
+                name='contact_dedup_created_at',
+                expireAfterSeconds=CONTACT_DEDUP_WINDOW_SECONDS,
+            ),
+        ],
+        # Shared rate limit counters are dropped once their window has passed
+        'rate_limits': [
+            IndexModel([('expires_at', ASCENDING)], name='rate_limits_expires_at', expireAfterSeconds=0),
+        ],
+        'analytics_events': [
+            IndexModel(
+                [('timestamp', ASCENDING)],
+                name='analytics_events_timestamp',
+                expireAfterSeconds=ANALYTICS_EVENT_TTL_SECONDS,
+            ),
+        ],
+        # One document per bucket, path and event; the unique key makes concurrent $inc upserts safe
+        'analytics_rollups': [
+            IndexModel(
+                [('granularity', ASCENDING), ('bucket', ASCENDING), ('path', ASCENDING), ('event', ASCENDING)],
+                name='analytics_rollups_key',
+                unique=True,
+            ),
+            # Each rollup carries expires_at from its granularity's retention
+            IndexModel([('expires_at', ASCENDING)], name='analytics_rollups_expires_at', expireAfterSeconds=0),
+        ],
+    }
+
+
+def _normalize_key(key):
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in key]
+
+
+def _text_weights(declared: dict) -> dict:
+    weights = declared.get('weights', {})
+    return {field: weights.get(field, 1) for field, kind in declared['key'].items() if kind == TEXT}
+
+
+def _index_differs(existing: dict, declared: dict) -> bool:
+    if TEXT in declared['key'].values():
+        # Text indexes are reported with _fts/_ftsx keys, so compare their fields and weights instead
+        return (
+            existing.get('weights') != _text_weights(declared)
+            or existing.get('default_language', 'english') != declared.get('default_language', 'english')
+        )
+    if _normalize_key(existing['key']) != _normalize_key(declared['key'].items()):
+        return True
+    return any(existing.get(option) != declared.get(option) for option in _COMPARED_OPTIONS)
+
+
+async def ensure_indexes(db, declarations=None):
+    """Create missing indexes and rebuild ones whose keys or options drifted
+
+    Indexes that are not declared here are left alone, so manually added
+    indexes survive a deploy.
+    """
+    declarations = declarations or declared_indexes()
+    for collection_name, models in declarations.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        to_create = []
+        for model in models:
+            declared = model.document
+            name = declared['name']
+            current = existing.get(name)
+            if current is None:
+                to_create.append(model)
+                continue
+            if not _index_differs(current, declared):
+                continue
+            only_ttl_changed = (
+                'expireAfterSeconds' in current
+                and 'expireAfterSeconds' in declared
+                and not _index_differs({**current, 'expireAfterSeconds': declared['expireAfterSeconds']}, declared)
+            )
+            if only_ttl_changed:
+                await db.command(SON([
+                    ('collMod', collection_name),
+                    ('index', {'name': name, 'expireAfterSeconds': declared['expireAfterSeconds']}),
+                ]))
+                logger.info(f"Updated TTL of index {collection_name}.{name}")
+                continue
+            logger.info(f"Rebuilding index {collection_name}.{name}: declaration changed")
+            await collection.drop_index(name)
+            to_create.append(model)
+        if to_create:
+            await collection.create_indexes(to_create)
+            logger.info(f"Created indexes on {collection_name}: {', '.join(m.document['name'] for m in to_create)}")
+        declared_names = {model.document['name'] for model in models} | {'_id_'}
+        for name in existing:
+            if name not in declared_names:
+                logger.info(f"Index {collection_name}.{name} is not declared in indexes.py")
+
+
+def hot_queries():
+    """The read paths that must be answered from an index without an in-memory sort"""
+    newest_first = SON([('timestamp', -1), ('id', -1)])
+    return [
+        ('contacts', {}, newest_first),
+        ('contacts', {'status': 'new'}, newest_first),
+        ('status_checks', {}, newest_first),
+    ]
+
+
+def _plan_stages(plan):
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+
+async def verify_query_plans(db, queries=None, limit: int = 51):
+    """Explain each hot query and return a description of every plan that scans or sorts in memory"""
+    problems = []
+    for collection_name, query, sort in queries or hot_queries():
+        explained = await db.command(SON([
+            ('explain', SON([
+                ('find', collection_name),
+                ('filter', query),
+                ('sort', sort),
+                ('limit', limit),
+            ])),
+            ('verbosity', 'queryPlanner'),
+        ]))
+        stages = set(_plan_stages(explained['queryPlanner']['winningPlan']))
+        bad = stages & {'COLLSCAN', 'SORT'}
+        if bad:
+            problems.append(f"{collection_name} {query} sorted by {dict(sort)}: {', '.join(sorted(bad))}")
+    return problems
@@ -0,0 +1,224 @@
+"""In-process metrics in the Prometheus text format, request timing and Server-Timing spans"""
+import threading
+import time
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted((key, ([*counts], count, total)) for key, (counts, count, total) in self._values.items())
+        for key, (counts, count, total) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = _format_labels(self.labelnames, key, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status'])
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'Time until the response is complete', ['method', 'route'])
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being served')
+MONGO_LATENCY = Histogram('mongo_command_duration_seconds', 'MongoDB command round trips', ['command'])
+MONGO_POOL_CONNECTIONS = Gauge('mongo_pool_connections', 'Open connections in the Motor pool', ['server'])
+MONGO_POOL_CHECKED_OUT = Gauge('mongo_pool_checked_out', 'Pool connections currently in use', ['server'])
+MONGO_POOL_WAITING = Gauge('mongo_pool_waiting', 'Operations waiting for a pool connection', ['server'])
+SMTP_LATENCY = Histogram('smtp_send_duration_seconds', 'Time to hand one email to the SMTP server')
+CONTACT_SUBMISSIONS = Counter('contact_submissions_total', 'Contact form submissions by outcome', ['result'])
+EMAIL_SENT = Counter('email_sent_total', 'Contact notification emails delivered')
+EMAIL_FAILURES = Counter('email_failures_total', 'Failed contact notification delivery attempts')
+ANALYTICS_EVENTS = Counter('analytics_events_total', 'Visit events by outcome', ['result'])
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'In-process cache lookups', ['cache', 'result'])
+
+
+class RequestSpans:
+    """Time spent per dependency while serving one request"""
+
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> bytes:
+        with self._lock:
+            parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.totals.items()]
+        parts.append(f'app;dur={total * 1000:.1f}')
+        return ', '.join(parts).encode('latin-1')
+
+
+# Motor copies the context into its executor threads, so command listeners
+# running there still see the request that issued the command
+_request_spans = ContextVar('request_spans', default=None)
+
+
+def record_span(name: str, seconds: float):
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.add(name, seconds)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every Mongo command into the histogram and the current request's span"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        self._observe(event)
+
+    def _observe(self, event):
+        seconds = event.duration_micros / 1e6
+        MONGO_LATENCY.observe(seconds, command=event.command_name)
+        record_span('mongo', seconds)
+
+
+class MetricsMiddleware:
+    """Records per-route latency and in-flight requests and emits a Server-Timing header
+
+    Routes in untimed_routes, such as long-lived event streams, are counted but
+    kept out of the latency histogram, where their duration would drown out
+    ordinary requests.
+    """
+
+    def __init__(self, app, untimed_routes=()):
+        self.app = app
+        self.untimed_routes = frozenset(untimed_routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        spans = RequestSpans()
+        token = _request_spans.set(spans)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', spans.server_timing(time.perf_counter() - start)))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _request_spans.reset(token)
+            route = scope.get('route')
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route_label = getattr(route, 'path', None) or 'unmatched'
+            if route_label not in self.untimed_routes:
+                HTTP_LATENCY.observe(time.perf_counter() - start, method=scope['method'], route=route_label)
+            HTTP_REQUESTS.inc(method=scope['method'], route=route_label, status=status)
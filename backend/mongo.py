@@ -0,0 +1,189 @@
+"""Shared Motor client with env-tuned pool and timeouts, connected by the lifespan handler"""
+import asyncio
+import os
+import threading
+import time
+
+from pymongo import monitoring
+
+from metrics import MONGO_POOL_CHECKED_OUT, MONGO_POOL_CONNECTIONS, MONGO_POOL_WAITING, MongoCommandMetrics
+
+
+HEALTH_PING_TIMEOUT_SECONDS = float(os.environ.get('HEALTH_PING_TIMEOUT_SECONDS', '2'))
+
+
+class MongoSettings:
+    def __init__(self, url, db_name, max_pool_size=100, min_pool_size=0, wait_queue_timeout_ms=2000,
+                 server_selection_timeout_ms=5000, connect_timeout_ms=5000, socket_timeout_ms=10000):
+        self.url = url
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.wait_queue_timeout_ms = wait_queue_timeout_ms
+        self.server_selection_timeout_ms = server_selection_timeout_ms
+        self.connect_timeout_ms = connect_timeout_ms
+        self.socket_timeout_ms = socket_timeout_ms
+
+    @classmethod
+    def from_env(cls):
+        # Bounded waits everywhere: a Mongo outage fails requests fast instead of hanging them
+        return cls(
+            url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+            min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+            wait_queue_timeout_ms=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+            server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+            connect_timeout_ms=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+            socket_timeout_ms=int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '10000')),
+        )
+
+    def client_options(self) -> dict:
+        return {
+            'maxPoolSize': self.max_pool_size,
+            'minPoolSize': self.min_pool_size,
+            'waitQueueTimeoutMS': self.wait_queue_timeout_ms,
+            'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+            'connectTimeoutMS': self.connect_timeout_ms,
+            'socketTimeoutMS': self.socket_timeout_ms,
+        }
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections per server from pool events"""
+
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _update(self, address, field, delta):
+        server = '%s:%s' % address
+        with self._lock:
+            pool = self._pools.setdefault(server, {'open': 0, 'checked_out': 0, 'waiting': 0})
+            pool[field] = max(0, pool[field] + delta)
+            value = pool[field]
+        gauge = {'open': MONGO_POOL_CONNECTIONS, 'checked_out': MONGO_POOL_CHECKED_OUT, 'waiting': MONGO_POOL_WAITING}[field]
+        gauge.set(value, server=server)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {server: dict(pool) for server, pool in self._pools.items()}
+
+    def connection_created(self, event):
+        self._update(event.address, 'open', 1)
+
+    def connection_closed(self, event):
+        self._update(event.address, 'open', -1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, 'waiting', 1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, 'waiting', -1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, 'waiting', -1)
+        self._update(event.address, 'checked_out', 1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, 'checked_out', -1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop('%s:%s' % event.address, None)
+
+    def connection_ready(self, event):
+        pass
+
+
+class Mongo:
+    """Owns the process-wide Motor client; one per worker, shared by every request"""
+
+    def __init__(self):
+        self.settings = None
+        self.client = None
+        self.database = None
+        self.pool_monitor = PoolMonitor()
+
+    def connect(self, settings: MongoSettings = None):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.settings = settings or MongoSettings.from_env()
+        self.client = AsyncIOMotorClient(
+            self.settings.url,
+            event_listeners=[MongoCommandMetrics(), self.pool_monitor],
+            **self.settings.client_options(),
+        )
+        self.database = self.client[self.settings.db_name]
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.database = None
+
+    @property
+    def db(self):
+        if self.database is None:
+            raise RuntimeError("MongoDB client is not connected")
+        return self.database
+
+    async def health(self) -> dict:
+        """Ping latency and pool saturation for the readiness probe"""
+        report = {'ok': False, 'ping_ms': None, 'max_pool_size': self.settings.max_pool_size if self.settings else None}
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.command('ping'), HEALTH_PING_TIMEOUT_SECONDS)
+            report['ok'] = True
+            report['ping_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            report['error'] = str(e) or type(e).__name__
+        pools = self.pool_monitor.snapshot()
+        for pool in pools.values():
+            if report['max_pool_size']:
+                pool['saturation'] = round(pool['checked_out'] / report['max_pool_size'], 3)
+        report['pools'] = pools
+        return report
+
+
+class LazyCollection:
+    """Collection handle that resolves against the client once it is connected
+
+    Components are built at import time with these, while the client itself is
+    only created by the lifespan handler.
+    """
+
+    def __init__(self, mongo: Mongo, name: str):
+        self.mongo = mongo
+        self.name = name
+        self._database = None
+        self._collection = None
+
+    def __getattr__(self, attribute):
+        database = self.mongo.db
+        if database is not self._database:
+            self._database = database
+            self._collection = database[self.name]
+        return getattr(self._collection, attribute)
+
+
+class LazyDatabase:
+    def __init__(self, mongo: Mongo):
+        self.mongo = mongo
+
+    def __getitem__(self, name) -> LazyCollection:
+        return LazyCollection(self.mongo, name)
+
+    def __getattr__(self, name) -> LazyCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return LazyCollection(self.mongo, name)
@@ -0,0 +1,260 @@
+"""Durable email outbox in Mongo, drained by a background worker over a reusable SMTP connection"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from metrics import EMAIL_FAILURES, EMAIL_SENT, SMTP_LATENCY
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '20'))
+OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', '5'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '6'))
+OUTBOX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_BACKOFF_SECONDS', '30'))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+# A message stuck in 'sending' longer than this is assumed orphaned by a crashed worker
+OUTBOX_LOCK_SECONDS = float(os.environ.get('OUTBOX_LOCK_SECONDS', '300'))
+SMTP_TIMEOUT_SECONDS = float(os.environ.get('SMTP_TIMEOUT_SECONDS', '30'))
+
+
+class SMTPSettings:
+    def __init__(self, server, port, username, password, recipient, use_tls=True):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.recipient = recipient
+        self.use_tls = use_tls
+
+    @classmethod
+    def from_env(cls):
+        """SMTP settings from the environment, or None when email is not configured"""
+        smtp_server = os.environ.get('SMTP_SERVER')
+        smtp_username = os.environ.get('SMTP_USERNAME')
+        smtp_password = os.environ.get('SMTP_PASSWORD')
+        if not all([smtp_server, smtp_username, smtp_password]):
+            return None
+        return cls(
+            server=smtp_server,
+            port=int(os.environ.get('SMTP_PORT', '587')),
+            username=smtp_username,
+            password=smtp_password,
+            recipient=os.environ.get('CONTACT_EMAIL'),
+            use_tls=os.environ.get('SMTP_STARTTLS', 'true').lower() != 'false',
+        )
+
+
+def build_contact_message(item: dict, settings: SMTPSettings):
+    """Notification email for one outbox item"""
+    # Imported on first use; the email package is only needed once SMTP is configured
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = settings.username
+    msg['To'] = settings.recipient or item['email']
+    msg['Subject'] = f"Portfolio Contact: {item['subject']}"
+
+    body = f"""
+        New contact form submission from your portfolio:
+
+        Name: {item['name']}
+        Email: {item['email']}
+        Subject: {item['subject']}
+
+        Message:
+        {item['message']}
+
+        ---
+        Sent from Jatin Garg's Portfolio Website
+        """
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class SMTPConnection:
+    """One SMTP session kept open between batches and re-established when it drops
+
+    All calls happen on a single dedicated thread, so blocking smtplib I/O never
+    runs on the event loop and the connection is never shared between threads.
+    """
+
+    def __init__(self, settings: SMTPSettings):
+        self.settings = settings
+        self._server = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='smtp')
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.settings.server, self.settings.port, timeout=SMTP_TIMEOUT_SECONDS)
+        if self.settings.use_tls:
+            server.starttls()
+        server.login(self.settings.username, self.settings.password)
+        return server
+
+    def _ensure_connected(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except OSError:
+                pass
+            self._close()
+        self._server = self._connect()
+        return self._server
+
+    def _send(self, msg):
+        import smtplib
+
+        try:
+            self._ensure_connected().send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server may drop idle sessions; retry once on a fresh connection
+            self._close()
+            self._ensure_connected().send_message(msg)
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except OSError:
+                pass
+            self._server = None
+
+    async def send(self, msg):
+        start = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._send, msg)
+        finally:
+            SMTP_LATENCY.observe(time.perf_counter() - start)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff for the given number of failed attempts"""
+    return min(OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+class EmailOutbox:
+    """Writes contact notifications to the email_outbox collection and delivers them in the background"""
+
+    def __init__(self, collection, settings: SMTPSettings = None):
+        self.collection = collection
+        self.settings = settings
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._connection = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings is not None
+
+    async def enqueue(self, contact: dict):
+        """Persist a notification for a stored contact; delivery happens later"""
+        now = datetime.utcnow()
+        await self.collection.insert_one({
+            'id': str(uuid.uuid4()),
+            'contact_id': contact['id'],
+            'name': contact['name'],
+            'email': contact['email'],
+            'subject': contact['subject'],
+            'message': contact['message'],
+            'status': 'pending',
+            'attempts': 0,
+            'created_at': now,
+            'next_attempt_at': now,
+        })
+        self._wakeup.set()
+
+    async def _claim(self):
+        """Atomically lease one due message so concurrent workers never send it twice"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {'$or': [
+                {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+                {'status': 'sending', 'locked_until': {'$lt': now}},
+            ]},
+            {'$set': {'status': 'sending', 'locked_until': now + timedelta(seconds=OUTBOX_LOCK_SECONDS)}},
+            sort=[('next_attempt_at', 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _deliver(self, item: dict):
+        try:
+            await self._connection.send(build_contact_message(item, self.settings))
+        except Exception as e:
+            EMAIL_FAILURES.inc()
+            attempts = item.get('attempts', 0) + 1
+            failed = attempts >= OUTBOX_MAX_ATTEMPTS
+            await self.collection.update_one({'id': item['id']}, {'$set': {
+                'status': 'failed' if failed else 'pending',
+                'attempts': attempts,
+                'last_error': str(e),
+                'next_attempt_at': datetime.utcnow() + timedelta(seconds=backoff_delay(attempts)),
+            }, '$unset': {'locked_until': ''}})
+            logger.warning(f"Failed to send contact email {item['id']} (attempt {attempts}): {str(e)}")
+            return False
+        await self.collection.update_one({'id': item['id']}, {
+            '$set': {'status': 'sent', 'sent_at': datetime.utcnow()},
+            '$unset': {'locked_until': ''},
+        })
+        EMAIL_SENT.inc()
+        logger.info(f"Contact email sent successfully for {item['name']}")
+        return True
+
+    async def drain(self) -> int:
+        """Send up to one batch of due messages over the shared connection"""
+        sent = 0
+        for _ in range(OUTBOX_BATCH_SIZE):
+            item = await self._claim()
+            if item is None:
+                break
+            if await self._deliver(item):
+                sent += 1
+        return sent
+
+    async def _run(self):
+        while True:
+            try:
+                while await self.drain() == OUTBOX_BATCH_SIZE:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {str(e)}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if not self.enabled:
+            logger.warning("SMTP configuration not found, email outbox worker not started")
+            return
+        self._connection = SMTPConnection(self.settings)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
@@ -0,0 +1,124 @@
+"""Keyset pagination helpers with opaque cursors"""
+import base64
+import json
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(document, sort_field: str = 'timestamp') -> str:
+    """Opaque cursor pointing just past the given document"""
+    value = document[sort_field]
+    raw = json.dumps({'t': value.isoformat(), 'id': document['id']}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Return the (timestamp, id) pair encoded in a cursor, or raise a 400"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(raw['t']), str(raw['id'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: str, sort_field: str = 'timestamp') -> dict:
+    """Mongo filter selecting documents after the cursor in (sort_field desc, id desc) order"""
+    value, last_id = decode_cursor(cursor)
+    return {'$or': [
+        {sort_field: {'$lt': value}},
+        {sort_field: value, 'id': {'$lt': last_id}},
+    ]}
+
+
+def keyset_sort(sort_field: str = 'timestamp'):
+    return [(sort_field, -1), ('id', -1)]
+
+
+def parse_fields(fields: str, allowed) -> dict:
+    """Mongo projection for a comma-separated field list; id and the sort key are always kept"""
+    projection = {'_id': 0}
+    if not fields:
+        return projection
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    for field in ['id', 'timestamp', *requested]:
+        projection[field] = 1
+    return projection
+
+
+async def fetch_page(cursor_obj, limit: int, sort_field: str = 'timestamp'):
+    """Read limit + 1 rows to learn whether another page exists without a count"""
+    documents = await cursor_obj.limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1], sort_field)
+    return documents, next_cursor
+
+
+def encode_ranked_cursor(document, score_field: str = 'score', sort_field: str = 'timestamp') -> str:
+    """Cursor for results ordered by (score desc, sort_field desc, id desc)"""
+    raw = json.dumps(
+        {'s': document[score_field], 't': document[sort_field].isoformat(), 'id': document['id']},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def ranked_keyset_filter(cursor: str, score_field: str = 'score', sort_field: str = 'timestamp') -> dict:
+    """Filter selecting documents after a ranked cursor; applied once the score is computed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        score, value, last_id = float(raw['s']), datetime.fromisoformat(raw['t']), str(raw['id'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {'$or': [
+        {score_field: {'$lt': score}},
+        {score_field: score, sort_field: {'$lt': value}},
+        {score_field: score, sort_field: value, 'id': {'$lt': last_id}},
+    ]}
+
+
+async def fetch_ranked_page(cursor_obj, limit: int, score_field: str = 'score', sort_field: str = 'timestamp'):
+    """fetch_page for an aggregation that already ends in a $limit of limit + 1"""
+    documents = await cursor_obj.to_list(limit + 1)
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_ranked_cursor(documents[-1], score_field, sort_field)
+    return documents, next_cursor
+
+
+def naive_utc(value):
+    """Aware datetimes converted to naive UTC, the form timestamps are stored in; naive ones are taken as UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def check_window(since=None, until=None):
+    """Both bounds as naive UTC, or a 400 when the window is empty"""
+    since, until = naive_utc(since), naive_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be earlier than 'until'")
+    return since, until
+
+
+def time_window(since=None, until=None, field: str = 'timestamp') -> dict:
+    """Mongo filter for a half-open [since, until) time window"""
+    since, until = check_window(since, until)
+    bounds = {}
+    if since is not None:
+        bounds['$gte'] = since
+    if until is not None:
+        bounds['$lt'] = until
+    return {field: bounds} if bounds else {}
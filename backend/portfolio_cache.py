@@ -0,0 +1,174 @@
+"""Pre-serialized portfolio payloads served with strong ETags"""
+import hashlib
+import os
+import threading
+
+import orjson
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from metrics import CACHE_LOOKUPS
+from compression import COMPRESSION_MIN_SIZE, compress, negotiate_encoding, supported_encodings
+from portfolio_search import PortfolioSearchIndex
+
+
+PORTFOLIO_MAX_AGE = int(os.environ.get('PORTFOLIO_CACHE_MAX_AGE', '300'))
+
+
+def serialize(document) -> bytes:
+    """Serialize a JSON document to compact UTF-8 bytes"""
+    return orjson.dumps(document)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the content hash of the body"""
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CachedPayload:
+    """Immutable JSON body, its ETag and pre-compressed variants, built once and reused"""
+
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = make_etag(body)
+        self.variants = {}
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            for encoding in supported_encodings():
+                self.variants[encoding] = compress(body, encoding, static=True)
+
+    def etag_for(self, encoding) -> str:
+        """Each content-coding is a distinct representation and gets its own strong ETag"""
+        if encoding is None:
+            return self.etag
+        return '%s-%s"' % (self.etag[:-1], encoding)
+
+    def matches(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        return any(
+            etag_matches(if_none_match, self.etag_for(encoding))
+            for encoding in (None, *self.variants)
+        )
+
+    @classmethod
+    def from_document(cls, document):
+        return cls(serialize(document))
+
+
+def payload_response(request: Request, payload: CachedPayload, max_age: int = PORTFOLIO_MAX_AGE) -> Response:
+    """Serve a cached payload, answering 304 when the client already has it"""
+    encoding = None
+    if payload.variants:
+        encoding = negotiate_encoding(request.headers.get('accept-encoding'), tuple(payload.variants))
+    headers = {
+        'ETag': payload.etag_for(encoding),
+        'Cache-Control': f'public, max-age={max_age}',
+        'Vary': 'Accept-Encoding',
+    }
+    if payload.matches(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type='application/json', headers=headers)
+    headers['Content-Encoding'] = encoding
+    return Response(content=payload.variants[encoding], media_type='application/json', headers=headers)
+
+
+class PortfolioSnapshot:
+    """One immutable generation of the portfolio: source version, validated model and payloads
+
+    Every top-level section is serialized once on its own, both as a standalone
+    payload and as a raw JSON fragment that sparse fieldsets are assembled from.
+    """
+
+    __slots__ = ('version', 'model', 'payload', 'sections', 'search_index', '_fragments', '_fieldsets', '_lock')
+
+    def __init__(self, version, model, document: dict):
+        self.version = version
+        self.model = model
+        self.payload = CachedPayload.from_document({"success": True, "data": document})
+        self._fragments = {name: serialize(value) for name, value in document.items()}
+        self.sections = {
+            name: CachedPayload(b'{"success":true,"data":' + fragment + b'}')
+            for name, fragment in self._fragments.items()
+        }
+        # Built with the snapshot, so it is only rebuilt when the data changes
+        self.search_index = PortfolioSearchIndex(document)
+        self._fieldsets = {}
+        self._lock = threading.Lock()
+
+    def fieldset(self, fields) -> CachedPayload:
+        """Payload holding only the given sections, built once per distinct combination"""
+        key = tuple(name for name in self._fragments if name in fields)
+        payload = self._fieldsets.get(key)
+        CACHE_LOOKUPS.inc(cache='portfolio_fieldset', result='miss' if payload is None else 'hit')
+        if payload is None:
+            body = b'{"success":true,"data":{' + b','.join(
+                serialize(name) + b':' + self._fragments[name] for name in key
+            ) + b'}}'
+            payload = CachedPayload(body)
+            # Bounded by the number of section combinations
+            with self._lock:
+                self._fieldsets[key] = payload
+        return payload
+
+
+class PortfolioCache:
+    """Holds the current portfolio snapshot; readers never see a half-built one
+
+    A new snapshot is fully built before it replaces the old one in a single
+    reference assignment, so get() needs no lock.
+    """
+
+    def __init__(self, loader, schema):
+        self._loader = loader
+        self.schema = schema
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def set(self, data, version=None) -> PortfolioSnapshot:
+        """Validate data against the schema, serialize it and swap it in atomically
+
+        Raises pydantic.ValidationError and keeps the current snapshot when the
+        data does not match the schema.
+        """
+        model = self.schema.model_validate(data)
+        snapshot = PortfolioSnapshot(version, model, model.model_dump(mode='json'))
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def refresh(self) -> PortfolioSnapshot:
+        """Rebuild the snapshot from the loader"""
+        return self.set(self._loader())
+
+    @property
+    def has_snapshot(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def snapshot(self) -> PortfolioSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def get(self) -> CachedPayload:
+        return self.snapshot.payload
@@ -0,0 +1,151 @@
+"""Inverted index over the portfolio's searchable text, built once per snapshot"""
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+
+
+# Keys whose strings are indexed, and the kind reported for the hits found under them
+FIELD_KINDS = {
+    'technologies': 'technology',
+    'skills': 'skill',
+    'achievements': 'achievement',
+    'myContributions': 'contribution',
+    'description': 'description',
+}
+# Short, curated lists beat a word buried in a paragraph
+KIND_WEIGHTS = {
+    'technology': 3.0,
+    'skill': 3.0,
+    'contribution': 1.5,
+    'achievement': 1.0,
+    'description': 1.0,
+}
+# Prefix matches ("multi" -> "multiplayer") count for less than whole tokens
+PREFIX_FACTOR = 0.5
+PHRASE_BONUS = 1.5
+
+# Keeps "c++" and "c#" whole; splits on everything else
+_TOKEN = re.compile(r'[a-z0-9]+[+#]*')
+
+
+def tokenize(text: str):
+    return _TOKEN.findall(text.lower())
+
+
+def _context(item: dict):
+    """Human label for the object a hit sits in, e.g. a project title or a role"""
+    if 'title' in item:
+        return item['title']
+    if 'role' in item:
+        where = item.get('company') or item.get('organization')
+        return f"{item['role']} at {where}" if where else item['role']
+    return None
+
+
+class SearchEntry:
+    __slots__ = ('section', 'path', 'kind', 'text', 'context', 'tokens')
+
+    def __init__(self, section, path, kind, text, context):
+        self.section = section
+        self.path = path
+        self.kind = kind
+        self.text = text
+        self.context = context
+        self.tokens = tokenize(text)
+
+    def to_dict(self, score: float) -> dict:
+        return {
+            'section': self.section,
+            'path': self.path,
+            'kind': self.kind,
+            'text': self.text,
+            'context': self.context,
+            'score': round(score, 4),
+        }
+
+
+class PortfolioSearchIndex:
+    """Token -> postings map with a sorted vocabulary for prefix lookups
+
+    Every query token must match, either exactly or as a prefix of an indexed
+    token. Hits are ranked by idf, the weight of the field they came from and
+    entry length, with a bonus when the query appears as a phrase.
+    """
+
+    def __init__(self, document: dict):
+        self.entries = []
+        for section, value in document.items():
+            self._collect(value, section, section, FIELD_KINDS.get(section), None)
+        postings = {}
+        for entry_id, entry in enumerate(self.entries):
+            for token, count in Counter(entry.tokens).items():
+                postings.setdefault(token, {})[entry_id] = count
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        total = len(self.entries)
+        self.idf = {token: math.log(1 + total / len(hits)) for token, hits in postings.items()}
+
+    def _collect(self, value, section, path, kind, context):
+        if isinstance(value, str):
+            if kind is not None:
+                self.entries.append(SearchEntry(section, path, kind, value, context))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self._collect(item, section, f"{path}[{index}]", kind, context)
+        elif isinstance(value, dict):
+            context = _context(value) or context
+            for key, item in value.items():
+                self._collect(item, section, f"{path}.{key}", FIELD_KINDS.get(key, kind), context)
+
+    def _expand(self, token: str):
+        """Indexed tokens matching a query token, with the factor each one scores at"""
+        matches = {}
+        start = bisect_left(self.vocabulary, token)
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(token):
+                break
+            matches[candidate] = 1.0 if candidate == token else PREFIX_FACTOR
+        return matches
+
+    def search(self, query: str, limit: int = 20, kind: str = None):
+        """Ranked hits for the query and the total number of matching entries"""
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, factor in self._expand(term).items():
+                weight = self.idf[token] * factor
+                for entry_id in self.postings[token]:
+                    if weight > term_scores.get(entry_id, 0.0):
+                        term_scores[entry_id] = weight
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {entry_id: score + term_scores[entry_id] for entry_id, score in scores.items() if entry_id in term_scores}
+            if not scores:
+                return [], 0
+
+        ranked = []
+        for entry_id, score in scores.items():
+            entry = self.entries[entry_id]
+            if kind is not None and entry.kind != kind:
+                continue
+            score *= KIND_WEIGHTS[entry.kind] / math.sqrt(len(entry.tokens))
+            if len(terms) > 1 and _contains_phrase(entry.tokens, terms):
+                score *= PHRASE_BONUS
+            ranked.append((score, entry_id))
+        ranked.sort(key=lambda hit: (-hit[0], hit[1]))
+        return [self.entries[entry_id].to_dict(score) for score, entry_id in ranked[:limit]], len(ranked)
+
+
+def _contains_phrase(tokens, terms):
+    """Whether the terms appear consecutively, the last one allowed to be a prefix"""
+    width = len(terms)
+    for start in range(len(tokens) - width + 1):
+        window = tokens[start:start + width]
+        if window[:-1] == terms[:-1] and window[-1].startswith(terms[-1]):
+            return True
+    return False
@@ -0,0 +1,93 @@
+"""Bundled portfolio data source, re-read in the background when its file changes"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+import runpy
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON/YAML file replacing portfolio_data.py as the bundled source
+PORTFOLIO_DATA_FILE = os.environ.get('PORTFOLIO_DATA_FILE')
+# How often the source file is checked for changes; 0 disables hot reload
+PORTFOLIO_WATCH_SECONDS = float(os.environ.get('PORTFOLIO_WATCH_SECONDS', '2'))
+
+
+def portfolio_source_path() -> Path:
+    if PORTFOLIO_DATA_FILE:
+        return Path(PORTFOLIO_DATA_FILE)
+    return Path(__file__).parent / 'portfolio_data.py'
+
+
+def load_portfolio_source(reload: bool = False):
+    """Read the portfolio document from the data file or the portfolio_data module"""
+    if PORTFOLIO_DATA_FILE:
+        path = Path(PORTFOLIO_DATA_FILE)
+        with open(path, encoding='utf-8') as f:
+            if path.suffix in ('.yaml', '.yml'):
+                import yaml
+                return yaml.safe_load(f)
+            return json.load(f)
+    if reload:
+        # Executes the current source directly; importlib.reload could pick up a stale .pyc
+        return runpy.run_path(str(portfolio_source_path()))['get_portfolio_data']()
+    return importlib.import_module('portfolio_data').get_portfolio_data()
+
+
+class PortfolioSourceWatcher:
+    """Polls the source file and rebuilds the cache off the event loop when it changes
+
+    The new snapshot is validated and serialized on a worker thread and swapped
+    in with one assignment, so requests keep being served from the previous
+    snapshot until the new one is complete. Invalid edits are logged and ignored.
+    """
+
+    def __init__(self, cache, path: Path = None, interval: float = PORTFOLIO_WATCH_SECONDS):
+        self.cache = cache
+        self.path = path or portfolio_source_path()
+        self.interval = interval
+        self._signature = None
+        self._task = None
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload(self):
+        try:
+            snapshot = self.cache.set(load_portfolio_source(reload=True))
+        except Exception as e:
+            logger.error(f"Ignoring invalid portfolio data in {self.path.name}: {str(e)}")
+            return
+        logger.info(f"Reloaded portfolio data from {self.path.name} (ETag {snapshot.payload.etag})")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            await loop.run_in_executor(None, self._reload)
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        self._signature = self._stat()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,122 @@
+"""Versioned portfolio document in Mongo behind the in-process PortfolioCache"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from pydantic import ValidationError
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+# 'module' serves portfolio_data.py; 'mongo' serves the portfolio collection
+PORTFOLIO_SOURCE = os.environ.get('PORTFOLIO_SOURCE', 'module').lower()
+# Upper bound on how stale other workers can be when change streams are unavailable
+PORTFOLIO_POLL_SECONDS = float(os.environ.get('PORTFOLIO_POLL_SECONDS', '5'))
+PORTFOLIO_DOCUMENT_ID = 'current'
+
+
+class PortfolioStore:
+    """Reads the portfolio from Mongo into the cache and keeps it fresh on every worker
+
+    Requests only ever touch the cache. A background task follows a change
+    stream on the document, or polls its version field on deployments without
+    change streams (standalone mongod), and rebuilds the cache when it moves.
+    Edits are made directly on the 'current' document: replace data and
+    $inc version, and every worker picks the new version up.
+    """
+
+    def __init__(self, collection, cache, seed_loader):
+        self.collection = collection
+        self.cache = cache
+        self.seed_loader = seed_loader
+        # Version whose data failed validation, so polling does not retry it every interval
+        self.rejected_version = None
+        self._task = None
+
+    async def load(self):
+        """Read, validate and cache the stored document, seeding it on first run"""
+        document = await self.collection.find_one({'_id': PORTFOLIO_DOCUMENT_ID})
+        if document is None:
+            data = self.seed_loader()
+            self.cache.schema.model_validate(data)
+            await self.collection.update_one(
+                {'_id': PORTFOLIO_DOCUMENT_ID},
+                {'$setOnInsert': {'data': data, 'version': 1, 'updated_at': datetime.utcnow()}},
+                upsert=True,
+            )
+            document = await self.collection.find_one({'_id': PORTFOLIO_DOCUMENT_ID})
+            logger.info("Seeded portfolio collection from portfolio_data.py")
+        current = self.cache.snapshot if self.cache.has_snapshot else None
+        if current is not None and current.version == document['version']:
+            return current
+        try:
+            snapshot = self.cache.set(document['data'], version=document['version'])
+        except ValidationError:
+            self.rejected_version = document['version']
+            raise
+        logger.info(f"Loaded portfolio version {document['version']}")
+        return snapshot
+
+    async def _reload(self):
+        """load() for the watchers: an edit that breaks the schema keeps the current snapshot"""
+        try:
+            await self.load()
+        except ValidationError as e:
+            logger.error(f"Ignoring portfolio edit that does not match the Portfolio schema:\n{e}")
+
+    async def _follow_change_stream(self):
+        pipeline = [{'$match': {'documentKey._id': PORTFOLIO_DOCUMENT_ID}}]
+        async with self.collection.watch(pipeline) as stream:
+            # Catch anything written between the initial load and the stream opening
+            await self._reload()
+            async for _ in stream:
+                await self._reload()
+
+    async def _poll_version(self):
+        while True:
+            await asyncio.sleep(PORTFOLIO_POLL_SECONDS)
+            try:
+                document = await self.collection.find_one(
+                    {'_id': PORTFOLIO_DOCUMENT_ID}, {'version': 1}
+                )
+                if document is not None and document['version'] not in (self.cache.snapshot.version, self.rejected_version):
+                    await self._reload()
+            except PyMongoError as e:
+                logger.warning(f"Error polling portfolio version: {str(e)}")
+
+    async def _watch(self):
+        while True:
+            try:
+                await self._follow_change_stream()
+            except OperationFailure as e:
+                # Change streams need a replica set or sharded cluster
+                logger.info(f"Portfolio change stream unavailable ({str(e)}), polling every {PORTFOLIO_POLL_SECONDS}s")
+                await self._poll_version()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Portfolio change stream interrupted: {str(e)}")
+                await asyncio.sleep(PORTFOLIO_POLL_SECONDS)
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as e:
+            # Serve the bundled data while Mongo is unreachable; the watcher reloads once it is back
+            logger.error(f"Error loading portfolio from Mongo, serving portfolio_data.py: {str(e)}")
+            self.cache.refresh()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                # Already ended on its own; shutdown carries on regardless
+                logger.error(f"Portfolio watcher had stopped with an error: {str(e)}")
+            self._task = None
@@ -0,0 +1,219 @@
+"""Sliding-window rate limiting for abuse-prone endpoints, with pluggable counter stores"""
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+
+logger = logging.getLogger(__name__)
+
+# 'memory' keeps counters per worker; 'mongo' shares them through a TTL collection
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory').lower()
+# Limits as "<requests>/<seconds>"
+CONTACT_RATE_LIMIT_PER_IP = os.environ.get('CONTACT_RATE_LIMIT_PER_IP', '5/600')
+CONTACT_RATE_LIMIT_PER_EMAIL = os.environ.get('CONTACT_RATE_LIMIT_PER_EMAIL', '3/3600')
+# Only enable behind a proxy that sets X-Forwarded-For, otherwise clients can spoof it
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', 'false').lower() == 'true'
+# Bodies larger than this are not parsed for per-email limits
+MAX_INSPECTED_BODY = 64 * 1024
+
+
+def parse_limit(value: str):
+    """Parse '<requests>/<seconds>' into a (limit, window) pair"""
+    count, _, seconds = value.partition('/')
+    return int(count), float(seconds)
+
+
+class MemoryCounterStore:
+    """Per-process fixed-window counters, at most max_keys of them
+
+    Entries are kept in insertion order, so making room pops expired windows
+    and, under a flood of distinct keys, the oldest ones first, in O(1) per
+    increment rather than a scan of every key.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self._counts = OrderedDict()
+        self._max_keys = max_keys
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    async def increment(self, key: str, window_id: int, expires_at: float) -> int:
+        entry_key = (key, window_id)
+        entry = self._counts.get(entry_key)
+        if entry is None:
+            self._make_room()
+            entry = self._counts[entry_key] = [0, expires_at]
+        entry[0] += 1
+        return entry[0]
+
+    async def get(self, key: str, window_id: int) -> int:
+        entry = self._counts.get((key, window_id))
+        return entry[0] if entry else 0
+
+    def _make_room(self):
+        now = time.time()
+        while self._counts:
+            _, expires_at = next(iter(self._counts.values()))
+            if expires_at > now and len(self._counts) < self._max_keys:
+                break
+            self._counts.popitem(last=False)
+
+
+class MongoCounterStore:
+    """Fixed-window counters shared by all workers, expired by a TTL index on expires_at"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def increment(self, key: str, window_id: int, expires_at: float) -> int:
+        document = await self.collection.find_one_and_update(
+            {'_id': f"{key}:{window_id}"},
+            {
+                '$inc': {'count': 1},
+                '$setOnInsert': {'expires_at': datetime.utcfromtimestamp(expires_at)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document['count']
+
+    async def get(self, key: str, window_id: int) -> int:
+        document = await self.collection.find_one({'_id': f"{key}:{window_id}"}, {'count': 1})
+        return document['count'] if document else 0
+
+
+class SlidingWindowLimiter:
+    """Approximates a sliding window by weighting the previous fixed window's count
+
+    Every attempt is counted, including rejected ones, so a client that keeps
+    hammering stays limited until it backs off.
+    """
+
+    def __init__(self, name: str, limit: int, window: float, store):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.store = store
+
+    async def hit(self, key: str, now: float = None):
+        """Record an attempt; return 0 when allowed, else the seconds to wait"""
+        now = time.time() if now is None else now
+        window_id = int(now // self.window)
+        elapsed = now - window_id * self.window
+        store_key = f"{self.name}:{key}"
+        current = await self.store.increment(store_key, window_id, (window_id + 2) * self.window)
+        previous = await self.store.get(store_key, window_id - 1)
+        weight = 1 - elapsed / self.window
+        if previous * weight + current <= self.limit:
+            return 0
+        if current > self.limit:
+            return math.ceil(self.window - elapsed)
+        # Wait until enough of the previous window has slid out
+        needed = (previous * weight + current - self.limit) / previous
+        return max(1, math.ceil(needed * self.window))
+
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope['headers']:
+            if name == b'x-forwarded-for':
+                return value.decode('latin-1').split(',')[0].strip()
+    client = scope.get('client')
+    return client[0] if client else 'unknown'
+
+
+class ContactRateLimitMiddleware:
+    """Rejects contact submissions over the per-IP or per-email limits with a 429
+
+    Runs before routing, so throttled requests never reach Mongo or SMTP. The
+    request body is read once to find the email and replayed to the app.
+    """
+
+    def __init__(self, app, ip_limiter: SlidingWindowLimiter, email_limiter: SlidingWindowLimiter, path: str = '/api/contact'):
+        self.app = app
+        self.ip_limiter = ip_limiter
+        self.email_limiter = email_limiter
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self._check(self.ip_limiter, client_ip(scope))
+        if retry_after:
+            await self._reject(send, retry_after)
+            return
+
+        body, more_body = b'', True
+        while more_body and len(body) <= MAX_INSPECTED_BODY:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        email = None
+        if not more_body:
+            try:
+                email = json.loads(body).get('email')
+            except (ValueError, AttributeError):
+                pass
+        if isinstance(email, str) and email:
+            retry_after = await self._check(self.email_limiter, email.strip().lower())
+            if retry_after:
+                await self._reject(send, retry_after)
+                return
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': more_body}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    async def _check(self, limiter: SlidingWindowLimiter, key: str) -> int:
+        try:
+            return await limiter.hit(key)
+        except Exception as e:
+            # Fail open: a counter store outage must not take the contact form down
+            logger.warning(f"Rate limiter {limiter.name} unavailable: {str(e)}")
+            return 0
+
+    async def _reject(self, send, retry_after: int):
+        body = b'{"detail":"Too many requests, please try again later."}'
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                (b'retry-after', str(retry_after).encode('latin-1')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def contact_rate_limiters(db):
+    """Per-IP and per-email limiters for POST /api/contact on the configured backend"""
+    if RATE_LIMIT_BACKEND == 'mongo':
+        store = MongoCounterStore(db.rate_limits)
+    else:
+        store = MemoryCounterStore()
+    ip_limit, ip_window = parse_limit(CONTACT_RATE_LIMIT_PER_IP)
+    email_limit, email_window = parse_limit(CONTACT_RATE_LIMIT_PER_EMAIL)
+    return (
+        SlidingWindowLimiter('contact-ip', ip_limit, ip_window, store),
+        SlidingWindowLimiter('contact-email', email_limit, email_window, store),
+    )
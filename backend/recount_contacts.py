@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Recount contacts per status and overwrite the inbox badge counters
+Workers only seed the counters when they are missing and then move them with
+$inc. Run this to repair drift, for example after a crash between a contact
+write and its counter update. $incs made while it runs are lost, so run it
+when the contact form and status changes are quiet.
+
+Example:
+    python recount_contacts.py
+"""
+
+import argparse
+import asyncio
+
+import server
+
+
+async def recount():
+    server.mongo.connect()
+    try:
+        before = await server.contact_status_counts.get()
+        after = await server.contact_status_counts.rebuild(server.db.contacts)
+    finally:
+        server.mongo.close()
+    return before, after
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    before, after = asyncio.run(recount())
+    for status, count in after.items():
+        print(f"{status:<10} {before[status]:>8} -> {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,79 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter, ValidationError
+from typing_extensions import TypedDict
+from typing import Dict, List, Optional, Union
 import uuid
-from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-
+from datetime import datetime, timedelta
 
+# Loaded before the local modules below, which read their settings at import time
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from compression import CompressionMiddleware
+from portfolio_cache import PortfolioCache, payload_response
+from portfolio_store import PORTFOLIO_SOURCE, PortfolioStore
+from portfolio_source import PortfolioSourceWatcher, load_portfolio_source
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, fetch_ranked_page, keyset_filter, keyset_sort, parse_fields,
+    check_window, naive_utc, ranked_keyset_filter, time_window,
+)
+from export import EXPORT_MEDIA_TYPES, csv_stream, ndjson_stream
+from outbox import EmailOutbox, SMTPSettings
+from write_buffer import WriteBuffer
+from indexes import ensure_indexes, verify_query_plans
+from rate_limit import ContactRateLimitMiddleware, contact_rate_limiters
+from idempotency import SubmissionDeduplicator, submission_key
+from contact_status import ContactStatusCounts, transition_contacts
+from contact_feed import ContactFeed
+from analytics import (
+    ANALYTICS_MAX_REQUEST_EVENTS, VisitRecorder, analytics_window, normalize_path, top_paths_pipeline,
+    visits_pipeline,
+)
+from metrics import CONTACT_SUBMISSIONS, REGISTRY, MetricsMiddleware
+from mongo import LazyDatabase, Mongo
+
+
+# MongoDB connection; the client itself is created by the lifespan handler
+mongo = Mongo()
+db = LazyDatabase(mongo)
+
+# Contact notifications are queued in Mongo and sent by a background worker
+email_outbox = EmailOutbox(db.email_outbox, SMTPSettings.from_env())
+
+# Write-behind batching for the insert-heavy endpoints (opt-in via WRITE_BUFFER_ENABLED)
+status_check_writes = WriteBuffer(db.status_checks)
+contact_writes = WriteBuffer(db.contacts)
+
+# Double-clicks and client retries are answered without storing or emailing again
+contact_deduplicator = SubmissionDeduplicator(db.contact_dedup)
+
+# Visit events are acknowledged immediately and written in batches with their rollups
+visit_recorder = VisitRecorder(db.analytics_events, db.analytics_rollups)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mongo.connect()
+    # The counter seed waits on Mongo while the cache warm-up is CPU-bound, so overlap them
+    await asyncio.gather(warm_portfolio_cache(), seed_contact_counts())
+    await start_background_workers()
+    try:
+        yield
+    finally:
+        await shutdown_db_client()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Create a router with the /api prefix; orjson encodes datetimes and UUIDs natively
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 
 # Define Models
@@ -38,6 +85,35 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+# Rows read back from Mongo were validated on insert, so they are serialized
+# directly by a precompiled serializer instead of being rebuilt as models
+class StatusCheckRow(TypedDict):
+    id: str
+    client_name: str
+    timestamp: datetime
+
+status_check_rows = TypeAdapter(List[StatusCheckRow])
+
+class StatusCount(BaseModel):
+    client_name: str
+    bucket: datetime
+    count: int
+
+class StatusSummary(BaseModel):
+    success: bool
+    granularity: str
+    since: datetime
+    until: datetime
+    data: List[StatusCount]
+
+# $dateFromParts arguments per bucket size, and the default look-back window for summaries
+_DATE_PARTS = (('year', '$year'), ('month', '$month'), ('day', '$dayOfMonth'), ('hour', '$hour'), ('minute', '$minute'))
+STATUS_GRANULARITIES = {
+    'minute': (_DATE_PARTS, timedelta(hours=1)),
+    'hour': (_DATE_PARTS[:4], timedelta(days=1)),
+    'day': (_DATE_PARTS[:3], timedelta(days=30)),
+}
+
 # Contact Form Models
 class ContactForm(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
@@ -49,8 +125,69 @@ class ContactResponse(BaseModel):
     success: bool
     message: str
 
+CONTACT_STATUSES = ('new', 'read', 'replied')
+CONTACT_FIELDS = ('id', 'name', 'email', 'subject', 'message', 'timestamp', 'status')
+MAX_STATUS_UPDATE_IDS = 1000
+
+class ContactFilter(BaseModel):
+    status: Optional[str] = Field(None, pattern='^(new|read|replied)$')
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # Required to select every contact, so an empty filter cannot move the whole inbox by mistake
+    all: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return self.status is None and self.since is None and self.until is None
+
+class ContactStatusUpdate(BaseModel):
+    status: str = Field(..., pattern='^(new|read|replied)$')
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=MAX_STATUS_UPDATE_IDS)
+    filter: Optional[ContactFilter] = None
+
+class ContactStatusCountsResponse(BaseModel):
+    success: bool
+    counts: Dict[str, int]
+
+class ContactStatusUpdateResponse(ContactStatusCountsResponse):
+    updated: int
+    transitions: Dict[str, int]
+
+# Analytics Models
+class VisitEvent(BaseModel):
+    path: str = Field(..., min_length=1, max_length=512)
+    event: str = Field('visit', pattern=r'^[a-z][a-z0-9_.-]{0,49}$')
+    referrer: Optional[str] = Field(None, max_length=2048)
+    session_id: Optional[str] = Field(None, max_length=100)
+
+class VisitCount(BaseModel):
+    bucket: datetime
+    count: int
+
+class VisitSeries(BaseModel):
+    success: bool
+    granularity: str
+    since: datetime
+    until: datetime
+    data: List[VisitCount]
+
+class PathCount(BaseModel):
+    path: str
+    count: int
+
+class TopPaths(BaseModel):
+    success: bool
+    granularity: str
+    since: datetime
+    until: datetime
+    data: List[PathCount]
+
 # Portfolio Models
-class PersonalInfo(BaseModel):
+# Validated once when the portfolio is loaded and then shared by every request, so frozen
+class PortfolioModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+class PersonalInfo(PortfolioModel):
     name: str
     title: str
     tagline: str
@@ -63,14 +200,14 @@ class PersonalInfo(BaseModel):
     profileImage: str
     bio: str
 
-class Experience(BaseModel):
+class Experience(PortfolioModel):
     company: str
     location: str
     role: str
     period: str
     achievements: List[str]
 
-class Project(BaseModel):
+class Project(PortfolioModel):
     title: str
     subtitle: str
     description: str
@@ -78,12 +215,12 @@ class Project(BaseModel):
     videoUrl: Optional[str] = None
     category: str
 
-class Skills(BaseModel):
+class Skills(PortfolioModel):
     gamedev: List[str]
     programming: List[str]
     tools: List[str]
 
-class CurrentWork(BaseModel):
+class CurrentWork(PortfolioModel):
     title: str
     subtitle: str
     company: str
@@ -92,16 +229,16 @@ class CurrentWork(BaseModel):
     technologies: List[str]
     impact: str
 
-class CoreStrength(BaseModel):
+class CoreStrength(PortfolioModel):
     title: str
     description: str
     skills: List[str]
 
-class CoreStrengths(BaseModel):
+class CoreStrengths(PortfolioModel):
     title: str
     areas: List[CoreStrength]
 
-class Education(BaseModel):
+class Education(PortfolioModel):
     degree: str
     institution: str
     period: str
@@ -109,14 +246,14 @@ class Education(BaseModel):
     additionalEducation: dict
     certifications: List[str]
 
-class Leadership(BaseModel):
+class Leadership(PortfolioModel):
     role: str
     organization: str
     period: str
     description: str
     achievements: List[str]
 
-class Portfolio(BaseModel):
+class Portfolio(PortfolioModel):
     personal: PersonalInfo
     currentWork: CurrentWork
     coreStrengths: CoreStrengths
@@ -126,138 +263,446 @@ class Portfolio(BaseModel):
     education: Education
     leadership: List[Leadership]
 
+class PortfolioResponse(BaseModel):
+    success: bool
+    data: Portfolio
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
 
+@api_router.get("/health")
+async def health():
+    """Readiness probe: Mongo ping latency and connection pool saturation"""
+    report = await mongo.health()
+    body = {"status": "ok" if report['ok'] else "unavailable", "mongo": report}
+    return ORJSONResponse(body, status_code=200 if report['ok'] else 503)
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await status_check_writes.insert(status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    client_name: Optional[str] = None,
+):
+    """Newest status checks first; the next page's cursor is returned in X-Next-Cursor"""
+    query = time_window(since, until)
+    if client_name is not None:
+        query['client_name'] = client_name
+    if cursor:
+        query.update(keyset_filter(cursor))
+    projection = {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+    status_checks, next_cursor = await fetch_page(
+        db.status_checks.find(query, projection).sort(keyset_sort()), limit
+    )
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+    return Response(
+        content=status_check_rows.dump_json(status_checks),
+        media_type="application/json",
+        headers=headers,
+    )
+
+@api_router.get("/status/summary", response_model=StatusSummary)
+async def get_status_summary(
+    granularity: str = Query('hour', pattern='^(minute|hour|day)$'),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    client_name: Optional[str] = None,
+):
+    """Status check counts per client_name per time bucket, grouped server-side"""
+    parts, default_window = STATUS_GRANULARITIES[granularity]
+    until = naive_utc(until) or datetime.utcnow()
+    since, until = check_window(since or until - default_window, until)
+    match = time_window(since, until)
+    if client_name is not None:
+        match['client_name'] = client_name
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "client_name": "$client_name",
+                "bucket": {"$dateFromParts": {part: {operator: "$timestamp"} for part, operator in parts}},
+            },
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id.bucket": 1, "_id.client_name": 1}},
+        {"$project": {"_id": 0, "client_name": "$_id.client_name", "bucket": "$_id.bucket", "count": 1}},
+    ]
+    try:
+        counts = await db.status_checks.aggregate(pipeline).to_list(None)
+    except Exception as e:
+        logger.error(f"Error aggregating status checks: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error aggregating status checks")
+    return StatusSummary(success=True, granularity=granularity, since=since, until=until, data=counts)
 
 # Portfolio API Endpoints
-@api_router.get("/portfolio")
-async def get_portfolio():
-    """Get portfolio data - for now returning static data, can be moved to DB later"""
-    from portfolio_data import get_portfolio_data
+def load_portfolio_data():
+    return load_portfolio_source()
+
+# Serialized once and reused; refresh() rebuilds it when the source data changes
+portfolio_cache = PortfolioCache(load_portfolio_data, Portfolio)
+portfolio_store = PortfolioStore(db.portfolio, portfolio_cache, load_portfolio_data)
+# Edits to the bundled data are picked up without restarting the workers
+portfolio_watcher = PortfolioSourceWatcher(portfolio_cache)
+
+@api_router.get("/portfolio", response_model=PortfolioResponse)
+async def get_portfolio(request: Request, fields: Optional[str] = None):
+    """Get portfolio data - served from the pre-serialized cache with ETag revalidation
+
+    ?fields=personal,skills returns only the listed sections. The document was
+    validated against Portfolio when it was loaded, so nothing is validated here.
+    """
+    try:
+        snapshot = portfolio_cache.snapshot
+    except Exception as e:
+        logger.error(f"Error fetching portfolio data: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching portfolio data")
+    requested = {f.strip() for f in (fields or '').split(',') if f.strip()}
+    if not requested:
+        # Absent, empty or blank ?fields= all mean the whole document
+        return payload_response(request, snapshot.payload)
+    unknown = requested - snapshot.sections.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown portfolio sections: {', '.join(sorted(unknown))}")
+    return payload_response(request, snapshot.fieldset(requested))
+
+# Declared before /portfolio/{section}, which would otherwise capture "search"
+@api_router.get("/portfolio/search")
+async def search_portfolio(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, pattern='^(technology|skill|achievement|contribution|description)$'),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Ranked matches for q across technologies, skills, achievements, contributions and descriptions
+
+    Every word must match, either whole or as a prefix, so "network multi"
+    finds entries mentioning network multiplayer.
+    """
+    try:
+        index = portfolio_cache.snapshot.search_index
+    except Exception as e:
+        logger.error(f"Error fetching portfolio data: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching portfolio data")
+    hits, total = index.search(q, limit, kind)
+    return ORJSONResponse({"success": True, "query": q, "total": total, "data": hits})
+
+@api_router.get("/portfolio/{section}")
+async def get_portfolio_section(request: Request, section: str):
+    """Get a single portfolio section, pre-serialized with its own ETag"""
     try:
-        portfolio_data = get_portfolio_data()
-        return {"success": True, "data": portfolio_data}
+        payload = portfolio_cache.snapshot.sections.get(section)
     except Exception as e:
         logger.error(f"Error fetching portfolio data: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching portfolio data")
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"Unknown portfolio section: {section}")
+    return payload_response(request, payload)
 
 # Contact Form Endpoint
+# Per-status totals for the unread badge, moved with every status change
+contact_status_counts = ContactStatusCounts(db.contact_counters, CONTACT_STATUSES)
+
+# Pushes stored submissions to open /api/contacts/stream connections
+contact_feed = ContactFeed(db.contacts, CONTACT_FIELDS)
+
+CONTACT_THANKS = "Thank you for your message! I'll get back to you soon."
+
 @api_router.post("/contact", response_model=ContactResponse)
-async def submit_contact_form(contact_data: ContactForm):
-    """Handle contact form submission"""
+async def submit_contact_form(
+    contact_data: ContactForm,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """Handle contact form submission
+
+    Repeats with the same Idempotency-Key, or the same email, subject and
+    message within CONTACT_DEDUP_WINDOW_SECONDS, get the original response.
+    """
     try:
         # Store contact form in database
         contact_dict = contact_data.dict()
         contact_dict['timestamp'] = datetime.utcnow()
         contact_dict['status'] = 'new'
         contact_dict['id'] = str(uuid.uuid4())
-        
+
+        dedup_key = submission_key(contact_dict, idempotency_key)
+        if not await contact_deduplicator.claim(dedup_key, contact_dict['id']):
+            CONTACT_SUBMISSIONS.inc(result='duplicate')
+            logger.info("Duplicate contact submission ignored")
+            return ContactResponse(success=True, message=CONTACT_THANKS)
+
         # Save to database
-        await db.contacts.insert_one(contact_dict)
-        
-        # Send email notification (if SMTP is configured)
         try:
-            await send_contact_email(contact_data)
-        except Exception as email_error:
-            logger.warning(f"Failed to send email notification: {str(email_error)}")
-            # Don't fail the API call if email fails
+            await contact_writes.insert(contact_dict)
+        except Exception:
+            await contact_deduplicator.release(dedup_key)
+            raise
+        try:
+            await contact_status_counts.increment({'new': 1})
+        except Exception as count_error:
+            # Repaired by running recount_contacts.py
+            logger.warning(f"Failed to update contact status counts: {str(count_error)}")
+        contact_feed.publish(contact_dict)
         
-        return ContactResponse(
-            success=True,
-            message="Thank you for your message! I'll get back to you soon."
-        )
+        # Queue email notification (if SMTP is configured); delivery never blocks the response
+        if email_outbox.enabled:
+            try:
+                await email_outbox.enqueue(contact_dict)
+            except Exception as email_error:
+                logger.warning(f"Failed to queue email notification: {str(email_error)}")
+                # Don't fail the API call if email fails
+        else:
+            logger.warning("SMTP configuration not found, skipping email notification")
+        
+        CONTACT_SUBMISSIONS.inc(result='accepted')
+        return ContactResponse(success=True, message=CONTACT_THANKS)
         
     except Exception as e:
+        CONTACT_SUBMISSIONS.inc(result='error')
         logger.error(f"Error processing contact form: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing contact form")
 
 @api_router.get("/contacts")
-async def get_contacts():
-    """Get all contact form submissions - admin endpoint"""
+async def get_contacts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Get contact form submissions, newest first, one keyset page at a time - admin endpoint"""
+    if status is not None and status not in CONTACT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    query = {}
+    if status is not None:
+        query['status'] = status
+    if cursor:
+        query.update(keyset_filter(cursor))
+    projection = parse_fields(fields, CONTACT_FIELDS)
     try:
-        contacts = await db.contacts.find({}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-        return {"success": True, "data": contacts}
+        contacts, next_cursor = await fetch_page(
+            db.contacts.find(query, projection).sort(keyset_sort()), limit
+        )
+        # Returned as a response so raw Mongo rows skip jsonable_encoder
+        return ORJSONResponse({"success": True, "data": contacts, "next_cursor": next_cursor})
     except Exception as e:
         logger.error(f"Error fetching contacts: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching contacts")
 
-# Email sending function
-async def send_contact_email(contact_data: ContactForm):
-    """Send email notification for contact form submission"""
-    
-    # Check if email configuration exists
-    smtp_server = os.environ.get('SMTP_SERVER')
-    smtp_port = os.environ.get('SMTP_PORT', '587')
-    smtp_username = os.environ.get('SMTP_USERNAME')
-    smtp_password = os.environ.get('SMTP_PASSWORD')
-    recipient_email = os.environ.get('CONTACT_EMAIL', contact_data.email)
-    
-    if not all([smtp_server, smtp_username, smtp_password]):
-        logger.warning("SMTP configuration not found, skipping email notification")
-        return
-    
+@api_router.get("/contacts/counts", response_model=ContactStatusCountsResponse)
+async def get_contact_counts():
+    """Contacts per status from the maintained counters, for unread badges - admin endpoint"""
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = smtp_username
-        msg['To'] = recipient_email
-        msg['Subject'] = f"Portfolio Contact: {contact_data.subject}"
-        
-        # Email body
-        body = f"""
-        New contact form submission from your portfolio:
-        
-        Name: {contact_data.name}
-        Email: {contact_data.email}
-        Subject: {contact_data.subject}
-        
-        Message:
-        {contact_data.message}
-        
-        ---
-        Sent from Jatin Garg's Portfolio Website
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        server = smtplib.SMTP(smtp_server, int(smtp_port))
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
-        logger.info(f"Contact email sent successfully for {contact_data.name}")
-        
+        counts = await contact_status_counts.get()
+    except Exception as e:
+        logger.error(f"Error fetching contact counts: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching contact counts")
+    return ContactStatusCountsResponse(success=True, counts=counts)
+
+@api_router.patch("/contacts/status", response_model=ContactStatusUpdateResponse)
+async def update_contact_status(update: ContactStatusUpdate):
+    """Move contacts selected by ids or by a filter to new, read or replied in bulk - admin endpoint"""
+    if (update.ids is None) == (update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'ids' or 'filter'")
+    sources = None
+    if update.ids is not None:
+        match = {"id": {"$in": update.ids}}
+    else:
+        if update.filter.is_empty and not update.filter.all:
+            raise HTTPException(status_code=400, detail="Empty filter; pass \"all\": true to update every contact")
+        match = time_window(update.filter.since, update.filter.until)
+        if update.filter.status is not None:
+            sources = [update.filter.status]
+    try:
+        moved, counts = await transition_contacts(db.contacts, contact_status_counts, match, update.status, sources)
+    except Exception as e:
+        logger.error(f"Error updating contact status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error updating contact status")
+    return ContactStatusUpdateResponse(
+        success=True, updated=sum(moved.values()), transitions=moved, counts=counts,
+    )
+
+@api_router.get("/contacts/search")
+async def search_contacts(
+    q: str = Query(..., min_length=1, max_length=200),
+    sort: str = Query('relevance', pattern='^(relevance|newest)$'),
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Full-text search over name, email, subject and message, one keyset page at a time - admin endpoint
+
+    Uses the contacts_text index. Results are ranked by text score unless
+    sort=newest; each row carries its score either way.
+    """
+    if status is not None and status not in CONTACT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    query = {"$text": {"$search": q}, **time_window(since, until)}
+    if status is not None:
+        query['status'] = status
+    projection = parse_fields(fields, CONTACT_FIELDS)
+    score = {"$meta": "textScore"}
+    if sort == 'newest':
+        if cursor:
+            query.update(keyset_filter(cursor))
+    else:
+        pipeline = [{"$match": query}, {"$addFields": {"score": score}}]
+        if cursor:
+            pipeline.append({"$match": ranked_keyset_filter(cursor)})
+        pipeline += [
+            {"$sort": {"score": -1, "timestamp": -1, "id": -1}},
+            {"$limit": limit + 1},
+            # An inclusion projection would otherwise drop the score
+            {"$project": {**projection, "score": 1} if len(projection) > 1 else projection},
+        ]
+    try:
+        if sort == 'newest':
+            contacts, next_cursor = await fetch_page(
+                db.contacts.find(query, {**projection, "score": score}).sort(keyset_sort()), limit
+            )
+        else:
+            contacts, next_cursor = await fetch_ranked_page(db.contacts.aggregate(pipeline), limit)
+        return ORJSONResponse({"success": True, "data": contacts, "next_cursor": next_cursor})
     except Exception as e:
-        logger.error(f"Error sending contact email: {str(e)}")
-        raise
+        logger.error(f"Error searching contacts: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error searching contacts")
+
+@api_router.get("/contacts/stream")
+async def stream_contacts(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """New contact submissions as Server-Sent Events - admin endpoint
+
+    Reconnecting clients send Last-Event-ID and receive what they missed
+    first. A comment line every CONTACT_FEED_HEARTBEAT_SECONDS keeps idle
+    connections open through proxies, and each stream ends after
+    CONTACT_FEED_MAX_STREAM_SECONDS so workers can shut down; EventSource
+    reconnects and resumes on its own.
+    """
+    contact_feed.check_capacity()
+    return StreamingResponse(
+        contact_feed.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/contacts/export")
+async def export_contacts(
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+):
+    """Stream contact submissions as NDJSON or CSV, oldest first - admin endpoint"""
+    if status is not None and status not in CONTACT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    query = time_window(since, until)
+    if status is not None:
+        query['status'] = status
+    cursor = db.contacts.find(query, {"_id": 0}).sort("timestamp", 1)
+    if format == 'csv':
+        body = csv_stream(cursor, CONTACT_FIELDS)
+    else:
+        body = ndjson_stream(cursor)
+    filename = f"contacts-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Analytics API Endpoints
+@api_router.post("/analytics/visit", status_code=202)
+async def record_visit(payload: Union[VisitEvent, List[VisitEvent]]):
+    """Accept one visit event or a batch; they are written to Mongo in the background"""
+    events = payload if isinstance(payload, list) else [payload]
+    if len(events) > ANALYTICS_MAX_REQUEST_EVENTS:
+        raise HTTPException(status_code=413, detail=f"At most {ANALYTICS_MAX_REQUEST_EVENTS} events per request")
+    # Bucketed by arrival time; client clocks are not trusted
+    received = datetime.utcnow()
+    accepted = visit_recorder.record([{**event.model_dump(), "timestamp": received} for event in events])
+    return {"success": True, "accepted": accepted}
+
+@api_router.get("/analytics/visits", response_model=VisitSeries)
+async def get_visit_series(
+    granularity: str = Query('hour', pattern='^(minute|hour|day)$'),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    path: Optional[str] = None,
+    event: Optional[str] = None,
+):
+    """Visit counts per time bucket, read from the pre-aggregated rollups"""
+    since, until = analytics_window(granularity, since, until)
+    if path is not None:
+        path = normalize_path(path)
+    try:
+        counts = await db.analytics_rollups.aggregate(
+            visits_pipeline(granularity, since, until, path, event)
+        ).to_list(None)
+    except Exception as e:
+        logger.error(f"Error reading visit rollups: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error reading visit analytics")
+    return VisitSeries(success=True, granularity=granularity, since=since, until=until, data=counts)
+
+@api_router.get("/analytics/top-paths", response_model=TopPaths)
+async def get_top_paths(
+    granularity: str = Query('day', pattern='^(minute|hour|day)$'),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    event: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Most visited paths in the window, read from the pre-aggregated rollups"""
+    since, until = analytics_window(granularity, since, until)
+    try:
+        counts = await db.analytics_rollups.aggregate(
+            top_paths_pipeline(granularity, since, until, limit, event)
+        ).to_list(None)
+    except Exception as e:
+        logger.error(f"Error reading visit rollups: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error reading visit analytics")
+    return TopPaths(success=True, granularity=granularity, since=since, until=until, data=counts)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Throttle contact submissions per IP and per email before any DB or SMTP work
+contact_ip_limiter, contact_email_limiter = contact_rate_limiters(db)
+app.add_middleware(
+    ContactRateLimitMiddleware,
+    ip_limiter=contact_ip_limiter,
+    email_limiter=contact_email_limiter,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only read the /api/status page cursor if it is exposed
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Negotiated gzip/brotli; pre-compressed cached payloads pass through untouched
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency covers every other middleware; event streams are not timed
+app.add_middleware(MetricsMiddleware, untimed_routes=["/api/contacts/stream"])
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -265,6 +710,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
+# Index builds on a large collection can take minutes, so they run behind the
+# first requests instead of holding up every worker's startup
+index_reconciliation = None
+
+async def bootstrap_indexes():
+    try:
+        await ensure_indexes(mongo.db)
+        for problem in await verify_query_plans(mongo.db):
+            logger.warning(f"Query not covered by an index: {problem}")
+    except Exception as e:
+        logger.error(f"Error reconciling indexes: {str(e)}")
+
+async def warm_portfolio_cache():
+    try:
+        if PORTFOLIO_SOURCE == 'mongo':
+            await portfolio_store.start()
+        else:
+            portfolio_cache.refresh()
+            portfolio_watcher.start()
+    except ValidationError as e:
+        # Refuse to start rather than serve a document that breaks the schema
+        raise RuntimeError(f"Portfolio data does not match the Portfolio schema:\n{e}") from e
+    logger.info("Portfolio cache warmed")
+
+async def seed_contact_counts():
+    try:
+        if await contact_status_counts.seed(db.contacts):
+            logger.info("Seeded contact status counters")
+    except Exception as e:
+        logger.error(f"Error seeding contact status counters: {str(e)}")
+
+async def start_background_workers():
+    global index_reconciliation
+    index_reconciliation = asyncio.create_task(bootstrap_indexes())
+    email_outbox.start()
+    contact_feed.start()
+
 async def shutdown_db_client():
-    client.close()
+    if index_reconciliation is not None and not index_reconciliation.done():
+        # Only stops waiting; a build the server has started carries on there
+        index_reconciliation.cancel()
+        await asyncio.gather(index_reconciliation, return_exceptions=True)
+    await status_check_writes.close()
+    await contact_writes.close()
+    await visit_recorder.close()
+    await contact_feed.stop()
+    await email_outbox.stop()
+    await portfolio_store.stop()
+    await portfolio_watcher.stop()
+    mongo.close()
@@ -0,0 +1,142 @@
+"""Opt-in write-behind buffer coalescing single inserts into insert_many batches"""
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+
+from pymongo.errors import BulkWriteError
+
+
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_ENABLED = os.environ.get('WRITE_BUFFER_ENABLED', 'false').lower() == 'true'
+WRITE_BUFFER_MAX_BATCH = int(os.environ.get('WRITE_BUFFER_MAX_BATCH', '100'))
+WRITE_BUFFER_MAX_DELAY_MS = float(os.environ.get('WRITE_BUFFER_MAX_DELAY_MS', '50'))
+# 'flush': callers wait until their batch is written; 'buffer': callers return once queued
+WRITE_BUFFER_DURABILITY = os.environ.get('WRITE_BUFFER_DURABILITY', 'flush').lower()
+
+DURABILITY_MODES = ('flush', 'buffer')
+
+
+class BatchBuffer(ABC):
+    """Collects items in-process and hands them to _write in batches of at most max_batch
+
+    A flush starts as soon as max_batch items are pending, otherwise max_delay
+    seconds after the first one arrived. One flush runs at a time and drains
+    everything that arrives while it is writing, so a slow or stalled
+    collection holds one pool connection rather than one per batch.
+    Subclasses implement _write.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._in_flight = 0
+        self._timer = None
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def buffered(self) -> int:
+        """Items not yet written, including the batch being written now"""
+        return len(self._pending) + self._in_flight
+
+    def _add(self, items):
+        self._pending.extend(items)
+        if len(self._pending) >= self.max_batch:
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._spawn_flush()
+
+    def _spawn_flush(self):
+        if self._lock.locked():
+            # The running flush picks up whatever is pending when its current batch is done
+            return
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Write everything currently buffered, at most max_batch items per _write"""
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            while self._pending:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._in_flight = len(batch)
+                try:
+                    await self._write(batch)
+                finally:
+                    self._in_flight = 0
+
+    @abstractmethod
+    async def _write(self, batch):
+        """Persist one batch; failures are handled here, flush() does not retry"""
+
+    async def close(self):
+        """Flush whatever is left; called from the shutdown hook"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+
+class WriteBuffer(BatchBuffer):
+    """Batches inserts into one collection, flushing on size or after max_delay_ms
+
+    When disabled every insert is a plain insert_one, so the buffer can wrap the
+    write paths unconditionally.
+    """
+
+    def __init__(
+        self,
+        collection,
+        enabled: bool = WRITE_BUFFER_ENABLED,
+        max_batch: int = WRITE_BUFFER_MAX_BATCH,
+        max_delay_ms: float = WRITE_BUFFER_MAX_DELAY_MS,
+        durability: str = WRITE_BUFFER_DURABILITY,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown write buffer durability mode: {durability}")
+        super().__init__(max_batch, max_delay_ms / 1000)
+        self.collection = collection
+        self.enabled = enabled
+        self.durability = durability
+
+    async def insert(self, document: dict):
+        if not self.enabled:
+            await self.collection.insert_one(document)
+            return
+        future = asyncio.get_running_loop().create_future() if self.durability == 'flush' else None
+        self._add([(document, future)])
+        if future is not None:
+            await future
+
+    async def _write(self, batch):
+        errors = {}
+        try:
+            await self.collection.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                errors[error['index']] = error
+        except Exception as e:
+            logger.error(f"Buffered insert of {len(batch)} documents into {self.collection.name} failed: {str(e)}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        if errors:
+            logger.error(f"Buffered insert into {self.collection.name}: {len(errors)} of {len(batch)} documents failed")
+        for index, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if index in errors:
+                future.set_exception(BulkWriteError({'writeErrors': [errors[index]]}))
+            else:
+                future.set_result(None)
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from analytics import OTHER_PATH, PathCatalog, VisitRecorder, normalize_path
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_normalize_path():
+    assert normalize_path('/Projects/?utm_source=x#top') == '/projects'
+    assert normalize_path('https://example.com//blog//post/') == '/blog/post'
+    assert normalize_path('about') == '/about'
+    assert normalize_path('/') == '/'
+    assert len(normalize_path('/' + 'a' * 400)) == 128
+
+
+def test_catalog_caps_distinct_paths_per_period():
+    catalog = PathCatalog(allowed=[], max_paths=2, period=60)
+    assert [catalog.resolve(path, now=0) for path in ('/a', '/b', '/c', '/A/')] == ['/a', '/b', OTHER_PATH, '/a']
+    # A new period makes room again
+    assert catalog.resolve('/c', now=60) == '/c'
+
+
+def test_junk_flood_only_crowds_out_new_paths_until_the_period_ends():
+    catalog = PathCatalog(allowed=[], max_paths=10, period=60)
+    for _ in range(20):
+        catalog.resolve('/', now=0)
+    for n in range(100):
+        catalog.resolve(f'/junk{n}', now=1)
+    assert catalog.resolve('/', now=2) == '/'
+    assert catalog.resolve('/projects', now=2) == OTHER_PATH
+
+    # The busiest paths carry over; the junk has to compete for the rest
+    assert catalog.resolve('/projects', now=60) == '/projects'
+    assert catalog.resolve('/', now=61) == '/'
+
+
+def test_catalog_allow_list():
+    catalog = PathCatalog(allowed=['/', '/projects'])
+    assert [catalog.resolve(path) for path in ('/', '/Projects?x=1', '/wp-admin')] == ['/', '/projects', OTHER_PATH]
+
+
+async def test_recorder_writes_events_and_rollups_in_one_flush():
+    db = AsyncMongoMockClient()['analytics_tests']
+    recorder = VisitRecorder(db.analytics_events, db.analytics_rollups, max_batch=100, flush_seconds=60)
+    now = datetime(2026, 10, 18, 12, 30, 15)
+    events = [{'path': path, 'event': 'visit', 'timestamp': now} for path in ('/', '/projects', '/Projects/')]
+    assert recorder.record(events) == 3
+    assert await db.analytics_events.count_documents({}) == 0
+    await recorder.close()
+
+    assert await db.analytics_events.count_documents({}) == 3
+    rollups = await db.analytics_rollups.find({'granularity': 'hour'}, {'_id': 0}).to_list(None)
+    assert {row['path']: row['count'] for row in rollups} == {'/': 1, '/projects': 2}
+    assert all(row['expires_at'] > now for row in rollups)
+
+
+async def test_recorder_drops_past_max_pending():
+    db = AsyncMongoMockClient()['analytics_tests']
+    recorder = VisitRecorder(db.analytics_events, db.analytics_rollups, max_batch=100, flush_seconds=60, max_pending=2)
+    events = [{'path': '/', 'event': 'visit', 'timestamp': datetime(2026, 10, 18)}] * 3
+    assert recorder.record(events) == 2
+    assert recorder.record(events) == 0
+    await recorder.close()
+
+
+async def test_visit_series_windows(client):
+    response = await client.get('/api/analytics/visits', params={'since': '2026-10-19T00:00:00', 'until': '2026-10-18T00:00:00'})
+    assert response.status_code == 400
+    response = await client.get('/api/analytics/top-paths', params={'since': '2026-10-18T00:00:00Z', 'until': '2026-10-19T00:00:00'})
+    assert response.status_code == 200
+    response = await client.get('/api/analytics/visits', params={'since': '2026-10-18T00:00:00Z'})
+    assert response.status_code == 200
+
+
+async def test_in_flight_events_count_toward_max_pending():
+    release = asyncio.Event()
+
+    class Stalled:
+        async def insert_many(self, documents, ordered=True):
+            await release.wait()
+
+        async def bulk_write(self, updates, ordered=True):
+            pass
+
+    recorder = VisitRecorder(Stalled(), Stalled(), max_batch=100, flush_seconds=60, max_pending=2000)
+    event = {'path': '/', 'event': 'visit', 'timestamp': datetime(2026, 10, 18)}
+    accepted = 0
+    for _ in range(1000):
+        accepted += recorder.record([event] * 100)
+        await asyncio.sleep(0)
+    assert accepted == 2000
+    release.set()
+    await recorder.close()
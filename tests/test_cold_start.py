@@ -0,0 +1,10 @@
+from benchmarks.cold_start import FIRST_REQUEST_BUDGET_MS, IMPORT_BUDGET_MS, measure_once
+
+
+def test_cold_start_within_budget():
+    """One fresh interpreter; benchmarks/cold_start.py reports medians over several"""
+    sample = measure_once()
+    assert sample['import_ms'] <= IMPORT_BUDGET_MS, f"import server took {sample['import_ms']:.0f} ms"
+    assert sample['first_request_ms'] <= FIRST_REQUEST_BUDGET_MS, (
+        f"first request ready after {sample['first_request_ms']:.0f} ms"
+    )
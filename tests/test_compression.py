@@ -0,0 +1,86 @@
+import gzip
+import zlib
+
+import pytest
+
+from compression import CompressionMiddleware, brotli, negotiate_encoding
+
+
+pytestmark = pytest.mark.anyio
+
+CHUNKS = [b'{"row": %d, "text": "%s"}\n' % (n, b'x' * 200) for n in range(20)]
+
+
+def streaming_app(content_type=b'application/x-ndjson', chunks=CHUNKS):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': index < len(chunks) - 1})
+    return app
+
+
+def single_body_app(body, headers=()):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/json'), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+    return app
+
+
+async def request(app, accept_encoding='gzip'):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': [(b'accept-encoding', accept_encoding.encode())]}
+    await CompressionMiddleware(app, minimum_size=1024)(scope, receive, send)
+    return dict(messages[0]['headers']), [message['body'] for message in messages[1:]]
+
+
+def test_negotiation_honours_q_values():
+    assert negotiate_encoding('gzip;q=0.5, br;q=0.9', ('br', 'gzip')) == 'br'
+    assert negotiate_encoding('br;q=0, gzip', ('br', 'gzip')) == 'gzip'
+    assert negotiate_encoding('*', ('br', 'gzip')) == 'br'
+    assert negotiate_encoding('identity', ('br', 'gzip')) is None
+    assert negotiate_encoding('', ('br', 'gzip')) is None
+
+
+async def test_streamed_chunks_are_decodable_as_they_arrive():
+    headers, bodies = await request(streaming_app())
+    assert headers[b'content-encoding'] == b'gzip'
+    assert b'content-length' not in headers
+    assert headers[b'vary'] == b'Accept-Encoding'
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each chunk is sync-flushed, so the client can decode it before the stream ends
+    for chunk, body in zip(CHUNKS, bodies):
+        assert decoder.decompress(body) == chunk
+    assert decoder.decompress(bodies[-1]) + decoder.flush() == b''
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli not installed')
+async def test_streamed_brotli():
+    headers, bodies = await request(streaming_app(), 'br')
+    assert headers[b'content-encoding'] == b'br'
+    assert brotli.decompress(b''.join(bodies)) == b''.join(CHUNKS)
+
+
+async def test_single_body_is_compressed_with_content_length():
+    body = b'{"data": "%s"}' % (b'y' * 4000)
+    headers, bodies = await request(single_body_app(body))
+    assert gzip.decompress(bodies[0]) == body
+    assert headers[b'content-length'] == str(len(bodies[0])).encode()
+
+
+async def test_small_precompressed_and_event_stream_bodies_pass_through():
+    _, bodies = await request(single_body_app(b'{"ok": true}'))
+    assert bodies == [b'{"ok": true}']
+
+    precompressed = gzip.compress(b'z' * 4000)
+    headers, bodies = await request(single_body_app(precompressed, [(b'content-encoding', b'gzip')]))
+    assert bodies == [precompressed]
+
+    headers, bodies = await request(streaming_app(b'text/event-stream'))
+    assert b'content-encoding' not in headers and bodies == CHUNKS
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from contact_feed import ContactFeed
+from pagination import decode_cursor
+
+
+pytestmark = pytest.mark.anyio
+
+FIELDS = ('id', 'name', 'timestamp')
+
+
+def contact(n):
+    return {'id': f'c{n}', 'name': f'Sender {n}', 'timestamp': datetime(2026, 10, 18) + timedelta(seconds=n)}
+
+
+@pytest.fixture
+def feed():
+    return ContactFeed(AsyncMongoMockClient()['feed_tests'].contacts, FIELDS)
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+async def test_stream_ends_after_max_seconds(feed):
+    chunks = await asyncio.wait_for(collect(feed.stream(heartbeat=0.02, max_seconds=0.1)), 2)
+    assert chunks[0].startswith(b'retry: ')
+    assert b': keepalive\n\n' in chunks
+    assert feed.subscriber_count == 0
+
+
+async def test_fresh_stream_gets_a_resume_position(feed):
+    await feed.collection.insert_many([contact(1), contact(2)])
+    chunks = await collect(feed.stream(max_seconds=0))
+    position = chunks[1].decode('ascii')
+    assert position.startswith('id: ') and position.endswith('\n\n') and 'data:' not in position
+    assert decode_cursor(position[4:].strip())[1] == 'c2'
+
+
+async def test_resume_from_backlog_after_a_capped_stream(feed):
+    feed.publish(contact(1))
+    stream = feed.stream(max_seconds=0.2)
+    await stream.__anext__()
+    position = (await stream.__anext__()).decode('ascii')[4:].strip()
+    rest = await collect(stream)
+    assert not any(b'event: contact' in chunk for chunk in rest)
+
+    # Published while the client was reconnecting
+    feed.publish(contact(2))
+    chunks = await collect(feed.stream(last_event_id=position, max_seconds=0))
+    events = [chunk for chunk in chunks if b'event: contact' in chunk]
+    assert len(events) == 1 and b'"c2"' in events[0]
+
+
+async def test_stop_closes_open_streams(feed):
+    task = asyncio.ensure_future(collect(feed.stream(max_seconds=60)))
+    await asyncio.sleep(0.05)
+    await feed.stop()
+    await asyncio.wait_for(task, 1)
+
+
+async def test_client_gone_before_the_body_leaves_no_subscriber(server, client):
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        raise OSError('client went away')
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': '/api/contacts/stream', 'raw_path': b'/api/contacts/stream', 'root_path': '', 'query_string': b'',
+        'headers': [(b'host', b'test')], 'client': ('127.0.0.1', 1234), 'server': ('test', 80),
+    }
+    for _ in range(5):
+        # Surfaces as the OSError itself or wrapped in an ExceptionGroup, depending on where it is hit
+        with pytest.raises(Exception):
+            await server.app(scope, receive, send)
+    assert server.contact_feed.subscriber_count == 0
+
+
+async def test_full_feed_is_a_503(client, monkeypatch):
+    import contact_feed
+
+    monkeypatch.setattr(contact_feed, 'CONTACT_FEED_MAX_SUBSCRIBERS', 0)
+    response = await client.get('/api/contacts/stream')
+    assert response.status_code == 503
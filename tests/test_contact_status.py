@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from contact_status import ContactStatusCounts, transition_contacts
+
+
+pytestmark = pytest.mark.anyio
+
+STATUSES = ('new', 'read', 'replied')
+
+
+@pytest.fixture
+async def db():
+    db = AsyncMongoMockClient()['contact_status_tests']
+    await db.contacts.insert_many([
+        {'id': f'c{n}', 'status': status, 'timestamp': datetime(2026, 10, 18, n)}
+        for n, status in enumerate(['new', 'new', 'new', 'read'])
+    ])
+    return db
+
+
+async def test_seed_only_creates_missing_counters(db):
+    counts = ContactStatusCounts(db.contact_counters, STATUSES)
+    assert await counts.seed(db.contacts)
+    assert await counts.get() == {'new': 3, 'read': 1, 'replied': 0}
+
+    # Later startups leave the live counters alone
+    await counts.increment({'new': 1})
+    assert not await counts.seed(db.contacts)
+    assert (await counts.get())['new'] == 4
+    assert await counts.rebuild(db.contacts) == {'new': 3, 'read': 1, 'replied': 0}
+
+
+async def test_transition_moves_counters(db):
+    counts = ContactStatusCounts(db.contact_counters, STATUSES)
+    await counts.seed(db.contacts)
+    moved, after = await transition_contacts(db.contacts, counts, {'id': {'$in': ['c0', 'c1', 'c3']}}, 'replied')
+    assert moved == {'new': 2, 'read': 1}
+    assert after == {'new': 1, 'read': 0, 'replied': 3}
+    assert after == await counts.count(db.contacts)
+
+
+async def test_empty_filter_is_rejected(client):
+    response = await client.patch('/api/contacts/status', json={'status': 'read', 'filter': {}})
+    assert response.status_code == 400
+    response = await client.patch('/api/contacts/status', json={'status': 'read', 'filter': {'all': True}})
+    assert response.status_code == 200
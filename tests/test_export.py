@@ -0,0 +1,37 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from export import csv_cell, csv_stream
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize('value', ['=HYPERLINK("http://evil")', '+1+1', '-2+3', '@SUM(A1)', '\tx', '\rx'])
+def test_formula_cells_are_escaped(value):
+    assert csv_cell(value) == "'" + value
+
+
+def test_plain_cells_are_unchanged():
+    assert csv_cell('Hello = world') == 'Hello = world'
+    assert csv_cell(datetime(2026, 10, 18, 12)) == '2026-10-18T12:00:00'
+    assert csv_cell(None) is None
+
+
+async def test_csv_export_escapes_user_text():
+    collection = AsyncMongoMockClient()['export_tests'].contacts
+    await collection.insert_one({
+        'id': 'c1', 'name': '=cmd|" /C calc"!A0', 'subject': '@subject', 'message': 'fine',
+        'timestamp': datetime(2026, 10, 18),
+    })
+    fields = ('id', 'name', 'subject', 'message', 'timestamp')
+    body = b''.join([chunk async for chunk in csv_stream(collection.find({}, {'_id': 0}), fields)])
+    rows = list(csv.DictReader(io.StringIO(body.decode('utf-8'))))
+    assert rows == [{
+        'id': 'c1', 'name': '\'=cmd|" /C calc"!A0', 'subject': "'@subject", 'message': 'fine',
+        'timestamp': '2026-10-18T00:00:00',
+    }]
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from idempotency import RecentKeys, SubmissionDeduplicator, submission_key
+
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {'email': 'Ada@Example.com ', 'subject': 'Hello there', 'message': 'A message long enough'}
+
+
+@pytest.fixture
+def collection():
+    return AsyncMongoMockClient()['dedup_tests'].contact_dedup
+
+
+def test_submission_key_prefers_idempotency_key_and_normalizes_email():
+    assert submission_key(CONTACT, 'abc') == submission_key({**CONTACT, 'message': 'different'}, 'abc')
+    assert submission_key(CONTACT) == submission_key({**CONTACT, 'email': 'ada@example.com'})
+    assert submission_key(CONTACT) != submission_key({**CONTACT, 'message': 'different'})
+
+
+def test_recent_keys_is_bounded():
+    recent = RecentKeys(max_entries=2, window=60)
+    for key in ('a', 'b', 'c'):
+        recent.add(key)
+    assert 'a' not in recent and 'b' in recent and 'c' in recent
+
+
+async def test_first_claim_wins(collection):
+    deduplicator = SubmissionDeduplicator(collection)
+    key = submission_key(CONTACT)
+    assert await deduplicator.claim(key, 'first')
+    assert not await deduplicator.claim(key, 'second')
+    assert (await collection.find_one({'_id': key}))['contact_id'] == 'first'
+
+
+async def test_claim_seen_by_another_worker(collection):
+    key = submission_key(CONTACT)
+    assert await SubmissionDeduplicator(collection).claim(key, 'first')
+    # A second worker has an empty in-process cache and relies on the collection
+    assert not await SubmissionDeduplicator(collection).claim(key, 'second')
+
+
+async def test_released_claim_can_be_retried(collection):
+    deduplicator = SubmissionDeduplicator(collection)
+    key = submission_key(CONTACT)
+    assert await deduplicator.claim(key, 'failed-write')
+    await deduplicator.release(key)
+    assert await collection.find_one({'_id': key}) is None
+    assert await deduplicator.claim(key, 'retry')
+
+
+async def test_claim_left_past_the_window_is_taken_over(collection):
+    key = submission_key(CONTACT)
+    # The TTL monitor has not removed it yet
+    await collection.insert_one({'_id': key, 'contact_id': 'old', 'created_at': datetime.utcnow() - timedelta(hours=1)})
+    assert await SubmissionDeduplicator(collection, window=600).claim(key, 'new')
+    assert (await collection.find_one({'_id': key}))['contact_id'] == 'new'
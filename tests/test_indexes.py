@@ -0,0 +1,18 @@
+import indexes
+
+
+def status_check_index_names():
+    return [model.document['name'] for model in indexes.declared_indexes()['status_checks']]
+
+
+def test_status_check_expiry_index_only_exists_with_a_ttl(monkeypatch):
+    monkeypatch.setattr(indexes, 'STATUS_CHECK_TTL_SECONDS', None)
+    assert 'status_checks_timestamp' not in status_check_index_names()
+
+    monkeypatch.setattr(indexes, 'STATUS_CHECK_TTL_SECONDS', '86400')
+    [expiry] = [
+        model.document for model in indexes.declared_indexes()['status_checks']
+        if model.document['name'] == 'status_checks_timestamp'
+    ]
+    assert expiry['expireAfterSeconds'] == 86400
+    assert 'status_checks_timestamp_id' in status_check_index_names()
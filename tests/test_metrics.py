@@ -0,0 +1,34 @@
+import pytest
+
+from metrics import HTTP_LATENCY, HTTP_REQUESTS, MetricsMiddleware
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Route:
+    def __init__(self, path):
+        self.path = path
+
+
+async def call(middleware, path):
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    await middleware({'type': 'http', 'method': 'GET', 'path': path, 'route': Route(path)}, receive, send)
+
+
+async def test_untimed_routes_are_counted_but_not_timed():
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    middleware = MetricsMiddleware(app, untimed_routes=['/test/stream'])
+    await call(middleware, '/test/stream')
+    await call(middleware, '/test/plain')
+    assert ('GET', '/test/stream') not in HTTP_LATENCY._values
+    assert ('GET', '/test/plain') in HTTP_LATENCY._values
+    assert HTTP_REQUESTS._values[('GET', '/test/stream', '200')] == 1
@@ -0,0 +1,137 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from mongomock_motor import AsyncMongoMockClient
+
+import outbox
+from outbox import EmailOutbox, SMTPConnection, SMTPSettings, backoff_delay
+
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {
+    'id': 'contact-1',
+    'name': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'subject': 'Hello there',
+    'message': 'A message long enough to pass validation',
+}
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+        self.failing = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.failing:
+            return '451 Temporary local problem'
+        self.messages.append(envelope)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def accept_password(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.password == b'secret')
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(
+        inbox, hostname='127.0.0.1', port=free_port(),
+        authenticator=accept_password, auth_require_tls=False,
+    )
+    controller.start()
+    yield controller, inbox
+    controller.stop()
+
+
+def settings_for(controller):
+    return SMTPSettings(controller.hostname, controller.port, 'site@example.com', 'secret', 'me@example.com', use_tls=False)
+
+
+@pytest.fixture
+async def make_outbox():
+    outboxes = []
+
+    def make(settings):
+        box = EmailOutbox(AsyncMongoMockClient()['outbox_tests'].email_outbox, settings)
+        # drain() is driven directly rather than through the background worker
+        box._connection = SMTPConnection(settings)
+        outboxes.append(box)
+        return box
+
+    yield make
+    for box in outboxes:
+        await box.stop()
+
+
+async def test_enqueued_message_is_sent(smtp_server, make_outbox):
+    controller, inbox = smtp_server
+    box = make_outbox(settings_for(controller))
+    await box.enqueue(CONTACT)
+    assert await box.drain() == 1
+
+    assert len(inbox.messages) == 1
+    assert inbox.messages[0].rcpt_tos == ['me@example.com']
+    assert b'Portfolio Contact: Hello there' in inbox.messages[0].content
+    item = await box.collection.find_one({'contact_id': 'contact-1'})
+    assert item['status'] == 'sent' and 'locked_until' not in item
+    assert await box.drain() == 0
+
+
+async def test_failed_delivery_backs_off_then_gives_up(smtp_server, make_outbox, monkeypatch):
+    controller, inbox = smtp_server
+    box = make_outbox(settings_for(controller))
+    inbox.failing = True
+    await box.enqueue(CONTACT)
+    before = datetime.utcnow()
+    assert await box.drain() == 0
+
+    item = await box.collection.find_one({'contact_id': 'contact-1'})
+    assert item['status'] == 'pending' and item['attempts'] == 1 and '451' in item['last_error']
+    assert item['next_attempt_at'] >= before + timedelta(seconds=backoff_delay(1))
+    assert 'locked_until' not in item
+    # Not due yet, so nothing is claimed
+    assert await box.drain() == 0
+    assert (await box.collection.find_one({'contact_id': 'contact-1'}))['attempts'] == 1
+
+    monkeypatch.setattr(outbox, 'OUTBOX_MAX_ATTEMPTS', 2)
+    await box.collection.update_one({'contact_id': 'contact-1'}, {'$set': {'next_attempt_at': datetime.utcnow()}})
+    assert await box.drain() == 0
+    item = await box.collection.find_one({'contact_id': 'contact-1'})
+    assert item['status'] == 'failed' and item['attempts'] == 2
+    assert inbox.messages == []
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_BACKOFF_SECONDS', 30)
+    monkeypatch.setattr(outbox, 'OUTBOX_MAX_BACKOFF_SECONDS', 100)
+    assert [backoff_delay(attempts) for attempts in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+async def test_expired_sending_lease_is_reclaimed(smtp_server, make_outbox):
+    controller, inbox = smtp_server
+    box = make_outbox(settings_for(controller))
+    now = datetime.utcnow()
+    base = {**CONTACT, 'status': 'sending', 'attempts': 0, 'created_at': now, 'next_attempt_at': now}
+    await box.collection.insert_many([
+        # Orphaned by a worker that crashed mid-send
+        {**base, 'id': 'expired', 'contact_id': 'c-expired', 'locked_until': now - timedelta(seconds=1)},
+        # Still held by a live worker
+        {**base, 'id': 'held', 'contact_id': 'c-held', 'locked_until': now + timedelta(minutes=5)},
+    ])
+    assert await box.drain() == 1
+
+    assert len(inbox.messages) == 1
+    assert (await box.collection.find_one({'id': 'expired'}))['status'] == 'sent'
+    assert (await box.collection.find_one({'id': 'held'}))['status'] == 'sending'
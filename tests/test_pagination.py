@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import naive_utc, time_window
+
+
+def test_naive_utc_converts_aware_values():
+    aware = datetime(2026, 10, 18, 2, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert naive_utc(aware) == datetime(2026, 10, 18, 0, 0)
+    assert naive_utc(datetime(2026, 10, 18)) == datetime(2026, 10, 18)
+    assert naive_utc(None) is None
+
+
+def test_time_window_accepts_mixed_aware_and_naive_bounds():
+    since = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    until = datetime(2026, 10, 19)
+    assert time_window(since, until) == {'timestamp': {'$gte': datetime(2026, 10, 18), '$lt': until}}
+    assert time_window(until, since.replace(day=20)) == {
+        'timestamp': {'$gte': until, '$lt': datetime(2026, 10, 20)},
+    }
+
+
+def test_time_window_compares_in_utc():
+    # 01:00+02:00 is 23:00 UTC the day before, so this window is empty
+    since = datetime(2026, 10, 19, 1, 0, tzinfo=timezone(timedelta(hours=2)))
+    with pytest.raises(HTTPException) as error:
+        time_window(since, datetime(2026, 10, 18, 23, 0))
+    assert error.value.status_code == 400
+
+
+def test_time_window_open_bounds():
+    assert time_window() == {}
+    assert time_window(until=datetime(2026, 10, 19, tzinfo=timezone.utc)) == {
+        'timestamp': {'$lt': datetime(2026, 10, 19)},
+    }
+
+
+@pytest.fixture
+async def contacts(server):
+    collection = server.db.contacts
+    await collection.delete_many({})
+    base = datetime(2026, 10, 18)
+    # Pairs share a timestamp, so the id tie-break decides their order
+    await collection.insert_many([
+        {'id': f'c{n:02d}', 'name': f'Sender {n}', 'email': f's{n}@example.com', 'subject': 'Subject',
+         'message': 'Message', 'status': 'read' if n % 3 else 'new', 'timestamp': base + timedelta(minutes=n // 2)}
+        for n in range(11)
+    ])
+    yield collection
+    await collection.delete_many({})
+
+
+async def read_all_pages(client, limit, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = {'limit': limit, **params, **({'cursor': cursor} if cursor else {})}
+        body = (await client.get('/api/contacts', params=query)).json()
+        ids += [row['id'] for row in body['data']]
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.anyio
+async def test_keyset_pages_cover_every_contact_once(client, contacts):
+    ids, pages = await read_all_pages(client, 3)
+    assert ids == [f'c{n:02d}' for n in reversed(range(11))]
+    assert pages == 4
+
+
+@pytest.mark.anyio
+async def test_keyset_pages_with_status_and_fields(client, contacts):
+    ids, _ = await read_all_pages(client, 2, status='new')
+    assert ids == ['c09', 'c06', 'c03', 'c00']
+    body = (await client.get('/api/contacts', params={'fields': 'email', 'limit': 1})).json()
+    assert set(body['data'][0]) == {'id', 'timestamp', 'email'}
+
+
+@pytest.mark.anyio
+async def test_invalid_cursor_and_fields_are_rejected(client, contacts):
+    assert (await client.get('/api/contacts', params={'cursor': 'not-a-cursor'})).status_code == 400
+    assert (await client.get('/api/contacts', params={'fields': 'password'})).status_code == 400
+
+
+@pytest.mark.anyio
+async def test_new_contacts_do_not_shift_later_pages(client, contacts):
+    first = (await client.get('/api/contacts', params={'limit': 4})).json()
+    await contacts.insert_one({'id': 'c99', 'status': 'new', 'timestamp': datetime(2026, 10, 19)})
+    second = (await client.get('/api/contacts', params={'limit': 4, 'cursor': first['next_cursor']})).json()
+    assert [row['id'] for row in second['data']] == ['c06', 'c05', 'c04', 'c03']
+
+
+@pytest.mark.anyio
+async def test_status_cursor_header_is_exposed_to_browsers(client, server):
+    await server.db.status_checks.delete_many({})
+    await server.db.status_checks.insert_many([
+        {'id': f's{n}', 'client_name': 'cors', 'timestamp': datetime(2026, 10, 18, 0, n)} for n in range(3)
+    ])
+    response = await client.get('/api/status', params={'limit': 2}, headers={'Origin': 'https://example.com'})
+    assert response.headers['x-next-cursor']
+    assert 'x-next-cursor' in response.headers['access-control-expose-headers'].lower()
+    await server.db.status_checks.delete_many({})
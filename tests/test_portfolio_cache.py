@@ -0,0 +1,128 @@
+import gzip
+
+import pytest
+
+from portfolio_cache import CachedPayload, etag_matches
+
+
+pytestmark = pytest.mark.anyio
+
+IDENTITY = {'Accept-Encoding': 'identity'}
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def test_etag_matches_handles_weak_lists_and_wildcard():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches(' * ', '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches('', '"a"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_cached_payload_matches_any_of_its_representations():
+    payload = CachedPayload(b'{"data":"%s"}' % (b'x' * 4096))
+    assert 'gzip' in payload.variants
+    gzip_etag = payload.etag_for('gzip')
+    assert gzip_etag == payload.etag[:-1] + '-gzip"'
+    assert payload.matches(payload.etag)
+    assert payload.matches(gzip_etag)
+    assert payload.matches('W/' + gzip_etag)
+    assert payload.matches('*')
+    assert not payload.matches('"stale"')
+    assert not payload.matches(None)
+
+
+async def test_portfolio_headers_and_revalidation(client):
+    response = await client.get('/api/portfolio', headers=IDENTITY)
+    assert response.status_code == 200
+    assert response.headers['cache-control'] == 'public, max-age=300'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert 'content-encoding' not in response.headers
+    etag = response.headers['etag']
+
+    revalidated = await client.get('/api/portfolio', headers={**IDENTITY, 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b''
+    assert revalidated.headers['etag'] == etag
+    assert revalidated.headers['cache-control'] == 'public, max-age=300'
+    assert revalidated.headers['vary'] == 'Accept-Encoding'
+
+    for if_none_match in ('W/' + etag, '"other", ' + etag, '*'):
+        response = await client.get('/api/portfolio', headers={**IDENTITY, 'If-None-Match': if_none_match})
+        assert response.status_code == 304, if_none_match
+    assert (await client.get('/api/portfolio', headers={**IDENTITY, 'If-None-Match': '"other"'})).status_code == 200
+
+
+async def test_each_encoding_gets_its_own_etag(client):
+    identity = await client.get('/api/portfolio', headers=IDENTITY)
+    async with client.stream('GET', '/api/portfolio', headers=GZIP) as compressed:
+        assert compressed.headers['content-encoding'] == 'gzip'
+        gzip_etag = compressed.headers['etag']
+        body = b''.join([chunk async for chunk in compressed.aiter_raw()])
+    assert gzip.decompress(body) == identity.content
+    assert gzip_etag == identity.headers['etag'][:-1] + '-gzip"'
+
+    # A cache holding either representation can revalidate it
+    response = await client.get('/api/portfolio', headers={**GZIP, 'If-None-Match': gzip_etag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == gzip_etag
+    response = await client.get('/api/portfolio', headers={**IDENTITY, 'If-None-Match': gzip_etag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == identity.headers['etag']
+
+
+async def test_sections_have_their_own_etags(client):
+    full = (await client.get('/api/portfolio', headers=IDENTITY)).json()['data']
+    etags = set()
+    for name in ('personal', 'skills'):
+        response = await client.get(f'/api/portfolio/{name}', headers=IDENTITY)
+        assert response.status_code == 200
+        assert response.json() == {'success': True, 'data': full[name]}
+        etags.add(response.headers['etag'])
+        revalidated = await client.get(
+            f'/api/portfolio/{name}', headers={**IDENTITY, 'If-None-Match': response.headers['etag']}
+        )
+        assert revalidated.status_code == 304
+    assert len(etags) == 2
+    assert (await client.get('/api/portfolio', headers=IDENTITY)).headers['etag'] not in etags
+
+
+async def test_unknown_section_is_404(client):
+    response = await client.get('/api/portfolio/nope')
+    assert response.status_code == 404
+    assert response.json()['detail'] == 'Unknown portfolio section: nope'
+
+
+async def test_fields_select_sections_in_document_order(client):
+    full = await client.get('/api/portfolio', headers=IDENTITY)
+    response = await client.get('/api/portfolio', params={'fields': ' skills, personal '}, headers=IDENTITY)
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert list(data) == ['personal', 'skills']
+    assert data == {name: full.json()['data'][name] for name in data}
+    assert response.headers['etag'] != full.headers['etag']
+    # Same set in another order is the same cached payload
+    again = await client.get('/api/portfolio', params={'fields': 'personal,skills'}, headers=IDENTITY)
+    assert again.headers['etag'] == response.headers['etag']
+    revalidated = await client.get(
+        '/api/portfolio', params={'fields': 'personal,skills'},
+        headers={**IDENTITY, 'If-None-Match': response.headers['etag']},
+    )
+    assert revalidated.status_code == 304
+
+
+async def test_unknown_fields_are_rejected(client):
+    response = await client.get('/api/portfolio', params={'fields': 'personal,bogus,alsobogus'})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Unknown portfolio sections: alsobogus, bogus'
+
+
+@pytest.mark.parametrize('fields', ['', ' , ', ',,'])
+async def test_blank_fields_return_the_full_document(client, fields):
+    full = await client.get('/api/portfolio', headers=IDENTITY)
+    response = await client.get('/api/portfolio', params={'fields': fields}, headers=IDENTITY)
+    assert response.status_code == 200
+    assert response.headers['etag'] == full.headers['etag']
+    assert response.content == full.content
@@ -0,0 +1,102 @@
+import pytest
+
+from portfolio_search import PHRASE_BONUS, PortfolioSearchIndex, tokenize
+
+
+DOCUMENT = {
+    'personal': {'name': 'Ada', 'title': 'Engineer'},
+    'skills': ['C++', 'C#', 'Python', 'Networking'],
+    'projects': [
+        {
+            'title': 'Arena',
+            'technologies': ['C++', 'Unreal Engine'],
+            'description': 'A network multiplayer shooter',
+            'myContributions': ['Wrote the multiplayer netcode', 'Built network tools'],
+        },
+        {
+            'title': 'Notes',
+            'technologies': ['Python'],
+            'description': 'Multiplayer note taking',
+        },
+    ],
+    'experience': [
+        {'role': 'Developer', 'company': 'Studio', 'achievements': ['Shipped network multiplayer support']},
+    ],
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return PortfolioSearchIndex(DOCUMENT)
+
+
+def test_tokenizer_keeps_cpp_and_csharp_whole():
+    assert tokenize('C++, C# and C') == ['c++', 'c#', 'and', 'c']
+    assert tokenize('Unreal-Engine 5') == ['unreal', 'engine', '5']
+
+
+def test_plus_plus_does_not_match_c_sharp(index):
+    hits, _ = index.search('c++')
+    assert {hit['text'] for hit in hits} == {'C++'}
+    hits, _ = index.search('c#')
+    assert [hit['text'] for hit in hits] == ['C#']
+
+
+def test_prefix_expands_and_scores_below_whole_token(index):
+    hits, _ = index.search('multi')
+    assert {hit['text'] for hit in hits} == {
+        'A network multiplayer shooter', 'Wrote the multiplayer netcode',
+        'Multiplayer note taking', 'Shipped network multiplayer support',
+    }
+    prefix = {hit['text']: hit['score'] for hit in index.search('pyth')[0]}
+    whole = {hit['text']: hit['score'] for hit in index.search('python')[0]}
+    assert prefix.keys() == whole.keys()
+    assert all(prefix[text] < whole[text] for text in whole)
+
+
+def test_every_term_must_match(index):
+    hits, total = index.search('network multiplayer')
+    assert {hit['text'] for hit in hits} == {'A network multiplayer shooter', 'Shipped network multiplayer support'}
+    assert total == 2
+    assert index.search('network zebra') == ([], 0)
+    assert index.search('  ,, ') == ([], 0)
+
+
+def test_phrase_bonus(index):
+    # Same tokens, one in order and one reversed, so only the phrase bonus separates them
+    document = {'skills': ['network multiplayer games', 'multiplayer network games']}
+    hits, _ = PortfolioSearchIndex(document).search('network multiplayer')
+    assert [hit['text'] for hit in hits] == ['network multiplayer games', 'multiplayer network games']
+    assert hits[0]['score'] == pytest.approx(hits[1]['score'] * PHRASE_BONUS, rel=1e-3)
+
+
+def test_kind_filter_and_total(index):
+    hits, total = index.search('multiplayer', limit=1)
+    assert len(hits) == 1
+    assert total == 4
+    hits, total = index.search('multiplayer', kind='description')
+    assert total == 2
+    assert {hit['kind'] for hit in hits} == {'description'}
+    assert index.search('multiplayer', kind='skill') == ([], 0)
+
+
+def test_hits_carry_path_and_context(index):
+    [hit], _ = index.search('shipped')
+    assert hit['section'] == 'experience'
+    assert hit['path'] == 'experience[0].achievements[0]'
+    assert hit['kind'] == 'achievement'
+    assert hit['context'] == 'Developer at Studio'
+    [hit], _ = index.search('netcode')
+    assert hit['context'] == 'Arena'
+    assert hit['kind'] == 'contribution'
+
+
+@pytest.mark.anyio
+async def test_search_endpoint_is_not_captured_by_section_route(client, server):
+    expected, total = server.portfolio_cache.snapshot.search_index.search('unreal', 5)
+    assert total > 0
+    response = await client.get('/api/portfolio/search', params={'q': 'unreal', 'limit': 5})
+    assert response.status_code == 200
+    assert response.json() == {'success': True, 'query': 'unreal', 'total': total, 'data': expected}
+    assert (await client.get('/api/portfolio/search')).status_code == 422
+    assert (await client.get('/api/portfolio/search', params={'q': 'x', 'kind': 'bogus'})).status_code == 422
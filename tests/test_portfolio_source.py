@@ -0,0 +1,20 @@
+import json
+
+import pytest
+
+import portfolio_source
+from portfolio_source import load_portfolio_source
+
+
+@pytest.mark.parametrize('suffix, dump', [
+    ('.json', json.dumps),
+    ('.yaml', lambda data: 'personal:\n  name: {name}\nskills: [{skills}]\n'.format(
+        name=data['personal']['name'], skills=', '.join(data['skills']),
+    )),
+])
+def test_data_file_formats(tmp_path, monkeypatch, suffix, dump):
+    data = {'personal': {'name': 'Jatin'}, 'skills': ['C++', 'Unreal']}
+    path = tmp_path / f'portfolio{suffix}'
+    path.write_text(dump(data), encoding='utf-8')
+    monkeypatch.setattr(portfolio_source, 'PORTFOLIO_DATA_FILE', str(path))
+    assert load_portfolio_source() == data
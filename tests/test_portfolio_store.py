@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+
+import portfolio_store
+from portfolio_store import PORTFOLIO_DOCUMENT_ID, PortfolioStore
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_portfolio_has_no_write_endpoint(client):
+    response = await client.put('/api/portfolio', json={})
+    assert response.status_code == 405
+
+
+async def test_direct_edit_is_picked_up_on_reload(server):
+    cache = server.PortfolioCache(server.load_portfolio_data, server.Portfolio)
+    store = PortfolioStore(AsyncMongoMockClient()['portfolio_tests'].portfolio, cache, server.load_portfolio_data)
+    seeded = await store.load()
+    assert seeded.version == 1
+
+    data = server.load_portfolio_data()
+    data['personal'] = {**data['personal'], 'tagline': 'Edited in Mongo'}
+    await store.collection.update_one(
+        {'_id': PORTFOLIO_DOCUMENT_ID}, {'$set': {'data': data}, '$inc': {'version': 1}},
+    )
+    reloaded = await store.load()
+    assert reloaded.version == 2
+    assert b'Edited in Mongo' in reloaded.payload.body
+
+
+async def test_polling_survives_an_invalid_edit(server, monkeypatch):
+    monkeypatch.setattr(portfolio_store, 'PORTFOLIO_POLL_SECONDS', 0.01)
+    cache = server.PortfolioCache(server.load_portfolio_data, server.Portfolio)
+    store = PortfolioStore(AsyncMongoMockClient()['portfolio_poll_tests'].portfolio, cache, server.load_portfolio_data)
+
+    def standalone_watch(pipeline):
+        raise OperationFailure('The $changeStream stage is only supported on replica sets')
+
+    monkeypatch.setattr(store.collection, 'watch', standalone_watch)
+    await store.start()
+    try:
+        data = server.load_portfolio_data()
+        await store.collection.update_one(
+            {'_id': PORTFOLIO_DOCUMENT_ID}, {'$set': {'data': {**data, 'personal': None}}, '$inc': {'version': 1}},
+        )
+        await asyncio.sleep(0.1)
+        assert cache.snapshot.version == 1 and not store._task.done()
+
+        data['personal'] = {**data['personal'], 'tagline': 'Fixed edit'}
+        await store.collection.update_one(
+            {'_id': PORTFOLIO_DOCUMENT_ID}, {'$set': {'data': data}, '$inc': {'version': 1}},
+        )
+        for _ in range(50):
+            if cache.snapshot.version == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert cache.snapshot.version == 3
+        assert b'Fixed edit' in cache.snapshot.payload.body
+    finally:
+        await store.stop()
+
+
+async def test_stop_tolerates_a_crashed_watcher(server):
+    cache = server.PortfolioCache(server.load_portfolio_data, server.Portfolio)
+    store = PortfolioStore(AsyncMongoMockClient()['portfolio_stop_tests'].portfolio, cache, server.load_portfolio_data)
+
+    async def crash():
+        raise RuntimeError('boom')
+
+    store._task = asyncio.ensure_future(crash())
+    await asyncio.sleep(0)
+    await store.stop()
+    assert store._task is None
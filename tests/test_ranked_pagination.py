@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import fetch_ranked_page, ranked_keyset_filter
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def scored():
+    """Rows with the score a $text search would have added, ties on score and on timestamp"""
+    collection = AsyncMongoMockClient()['ranked_tests'].contacts
+    base = datetime(2026, 10, 18)
+    await collection.insert_many([
+        {'id': f'c{n:02d}', 'score': [2.5, 1.0, 1.0, 0.75][n % 4], 'timestamp': base + timedelta(hours=n // 3)}
+        for n in range(14)
+    ])
+    return collection
+
+
+def ranked_page(collection, limit, cursor=None):
+    # The same stages /api/contacts/search appends once the score is known
+    pipeline = [{'$match': ranked_keyset_filter(cursor)}] if cursor else []
+    pipeline += [{'$sort': {'score': -1, 'timestamp': -1, 'id': -1}}, {'$limit': limit + 1}, {'$project': {'_id': 0}}]
+    return fetch_ranked_page(collection.aggregate(pipeline), limit)
+
+
+async def test_ranked_pages_follow_score_then_recency(scored):
+    expected = [
+        row['id'] for row in sorted(
+            await scored.find({}, {'_id': 0}).to_list(None),
+            key=lambda row: (row['score'], row['timestamp'], row['id']), reverse=True,
+        )
+    ]
+    ids, cursor = [], None
+    while True:
+        rows, cursor = await ranked_page(scored, 4, cursor)
+        ids += [row['id'] for row in rows]
+        if cursor is None:
+            break
+    assert ids == expected
+
+
+async def test_last_page_has_no_cursor(scored):
+    rows, cursor = await ranked_page(scored, 14)
+    assert len(rows) == 14 and cursor is None
+
+
+def test_invalid_ranked_cursor_is_a_400():
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as error:
+        ranked_keyset_filter('bm90LWEtY3Vyc29y')
+    assert error.value.status_code == 400
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from rate_limit import MemoryCounterStore, SlidingWindowLimiter, parse_limit
+
+
+pytestmark = pytest.mark.anyio
+
+# Start of a future 60s window; the store expires entries by wall-clock time
+BASE = (int(time.time()) // 60 + 10) * 60
+
+
+def test_parse_limit():
+    assert parse_limit('5/600') == (5, 600.0)
+
+
+async def test_limit_within_one_window():
+    limiter = SlidingWindowLimiter('test', 3, 60, MemoryCounterStore())
+    assert [await limiter.hit('a', now=BASE) for _ in range(3)] == [0, 0, 0]
+    # Over the limit in the current window alone: wait for the window to end
+    assert await limiter.hit('a', now=BASE + 10) == 50
+    assert await limiter.hit('b', now=BASE + 10) == 0
+
+
+async def test_previous_window_is_weighted_by_overlap():
+    limiter = SlidingWindowLimiter('test', 3, 60, MemoryCounterStore())
+    for _ in range(4):
+        await limiter.hit('a', now=BASE)
+    # Half way through the next window the previous 4 weigh 2
+    assert await limiter.hit('a', now=BASE + 90) == 0
+    # 2 + 2 > 3: a quarter of the previous window has to slide out first
+    assert await limiter.hit('a', now=BASE + 90) == 15
+    # Two windows later the old count no longer matters
+    assert await limiter.hit('a', now=BASE + 180) == 0
+
+
+async def test_store_never_exceeds_max_keys():
+    store = MemoryCounterStore(max_keys=1000)
+    expires_at = time.time() + 7200
+    for n in range(3000):
+        await store.increment(f'email:{n}', 1, expires_at)
+    assert len(store) == 1000
+    # The oldest keys made room for the newest
+    assert await store.get('email:0', 1) == 0
+    assert await store.get('email:2999', 1) == 1
+
+
+async def test_store_drops_expired_windows_first():
+    store = MemoryCounterStore(max_keys=10)
+    await store.increment('old', 1, time.time() - 1)
+    await store.increment('live', 1, time.time() + 60)
+    assert await store.get('old', 1) == 0
+    assert await store.increment('live', 1, time.time() + 60) == 2
+    assert len(store) == 1
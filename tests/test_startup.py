@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_startup_does_not_wait_for_index_builds(server, monkeypatch):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_ensure_indexes(db):
+        started.set()
+        await release.wait()
+
+    monkeypatch.setattr(server, 'ensure_indexes', slow_ensure_indexes)
+    async with server.app.router.lifespan_context(server.app):
+        await asyncio.wait_for(started.wait(), 1)
+        assert not server.index_reconciliation.done()
+    # Shutdown stops waiting on the build instead of hanging
+    assert server.index_reconciliation.done()
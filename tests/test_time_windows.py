@@ -0,0 +1,24 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+# What a browser's Date.toISOString() sends
+SINCE_Z = '2026-10-18T00:00:00Z'
+
+
+@pytest.mark.parametrize('path', ['/api/status', '/api/status/summary', '/api/contacts/export'])
+async def test_mixed_aware_and_naive_bounds(client, path):
+    response = await client.get(path, params={'since': SINCE_Z, 'until': '2026-10-19T00:00:00'})
+    assert response.status_code == 200
+
+
+async def test_summary_with_aware_since_and_default_until(client):
+    response = await client.get('/api/status/summary', params={'since': SINCE_Z})
+    assert response.status_code == 200
+    assert response.json()['since'].startswith('2026-10-18T00:00:00')
+
+
+async def test_summary_rejects_inverted_window(client):
+    response = await client.get('/api/status/summary', params={'since': '2026-10-19T00:00:00Z', 'until': '2026-10-18T00:00:00'})
+    assert response.status_code == 400
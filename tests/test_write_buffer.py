@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+from write_buffer import BatchBuffer, WriteBuffer
+
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingCollection:
+    """Passes writes through to mongomock and records how they were batched"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+        self.batches = []
+        self.single_inserts = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append(len(documents))
+        return await self.collection.insert_many(documents, ordered=ordered)
+
+    async def insert_one(self, document):
+        self.single_inserts += 1
+        return await self.collection.insert_one(document)
+
+
+class BrokenCollection:
+    name = 'broken'
+
+    async def insert_many(self, documents, ordered=True):
+        raise ConnectionError('mongo is down')
+
+
+@pytest.fixture
+async def collection():
+    collection = AsyncMongoMockClient()['write_buffer_tests'].items
+    await collection.create_index('id', unique=True)
+    return CountingCollection(collection)
+
+
+async def test_disabled_buffer_inserts_one_at_a_time(collection):
+    buffer = WriteBuffer(collection, enabled=False)
+    await buffer.insert({'id': 'a'})
+    assert collection.single_inserts == 1 and collection.batches == []
+
+
+async def test_concurrent_inserts_share_a_batch_and_all_resolve(collection):
+    buffer = WriteBuffer(collection, enabled=True, max_batch=100, max_delay_ms=10)
+    await asyncio.gather(*(buffer.insert({'id': f'd{n}'}) for n in range(25)))
+    assert collection.batches == [25]
+    assert await collection.collection.count_documents({}) == 25
+
+
+async def test_full_batch_flushes_without_waiting_for_the_timer(collection):
+    buffer = WriteBuffer(collection, enabled=True, max_batch=10, max_delay_ms=60000)
+    await asyncio.wait_for(asyncio.gather(*(buffer.insert({'id': f'd{n}'}) for n in range(20))), 1)
+    assert collection.batches == [10, 10]
+
+
+async def test_only_the_failed_document_raises(collection):
+    await collection.collection.insert_one({'id': 'taken'})
+    buffer = WriteBuffer(collection, enabled=True, max_delay_ms=10)
+    results = await asyncio.gather(
+        buffer.insert({'id': 'fresh'}), buffer.insert({'id': 'taken'}), buffer.insert({'id': 'other'}),
+        return_exceptions=True,
+    )
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], BulkWriteError)
+    assert await collection.collection.count_documents({}) == 3
+
+
+async def test_failed_batch_raises_in_every_caller():
+    buffer = WriteBuffer(BrokenCollection(), enabled=True, max_delay_ms=10)
+    results = await asyncio.gather(*(buffer.insert({'id': n}) for n in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+async def test_buffer_mode_returns_before_the_write_and_close_flushes(collection):
+    buffer = WriteBuffer(collection, enabled=True, max_delay_ms=60000, durability='buffer')
+    await buffer.insert({'id': 'queued'})
+    assert collection.batches == []
+    await buffer.close()
+    assert collection.batches == [1]
+
+
+def test_unknown_durability_is_rejected():
+    with pytest.raises(ValueError):
+        WriteBuffer(BrokenCollection(), durability='eventually')
+
+
+class StalledCollection:
+    """insert_many blocks until released, like a collection during a primary election"""
+
+    name = 'stalled'
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.written = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await self.release.wait()
+            self.written += len(documents)
+        finally:
+            self.concurrent -= 1
+
+
+async def test_one_flush_at_a_time_while_the_collection_stalls():
+    collection = StalledCollection()
+    buffer = WriteBuffer(collection, enabled=True, max_batch=10, max_delay_ms=1, durability='buffer')
+    for n in range(100):
+        await buffer.insert({'id': n})
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+    assert collection.max_concurrent == 1
+    assert buffer.buffered == 100
+    collection.release.set()
+    await buffer.close()
+    assert collection.written == 100 and buffer.buffered == 0
+
+
+async def test_items_added_after_a_flush_still_get_a_timer(collection):
+    buffer = WriteBuffer(collection, enabled=True, max_batch=100, max_delay_ms=5)
+    await buffer.insert({'id': 'first'})
+    await asyncio.wait_for(buffer.insert({'id': 'second'}), 1)
+    assert collection.batches == [1, 1]
+
+
+async def test_timer_firing_during_a_flush_does_not_strand_later_items():
+    collection = StalledCollection()
+    buffer = WriteBuffer(collection, enabled=True, max_batch=100, max_delay_ms=1, durability='buffer')
+    await buffer.insert({'id': 1})
+    await asyncio.sleep(0.01)
+    # Its timer fires while the first flush is still stalled
+    await buffer.insert({'id': 2})
+    await asyncio.sleep(0.01)
+    collection.release.set()
+    await asyncio.sleep(0.01)
+    assert collection.written == 2
+    await buffer.insert({'id': 3})
+    await asyncio.sleep(0.01)
+    assert collection.written == 3
+
+
+def test_batch_buffer_requires_a_write_implementation():
+    class Forgetful(BatchBuffer):
+        pass
+
+    with pytest.raises(TypeError):
+        Forgetful(10, 0.1)